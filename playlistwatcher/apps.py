@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class PlaylistWatcherConfig(AppConfig):
+    name = "playlistwatcher"
+    verbose_name = "Playlist Watcher"
+
+    def ready(self):
+        # Enregistre le receiver des pragmas SQLite (connection_created)
+        from . import db  # noqa: F401
@@ -0,0 +1,105 @@
+"""
+Configuration SQLite et coordination des écritures.
+
+- Les pragmas (WAL, busy timeout, synchronous) sont appliqués à chaque
+  nouvelle connexion via le signal ``connection_created`` : DEFAULT_SQLITE_PRAGMAS,
+  ou settings.SQLITE_PRAGMAS s'il est défini. Le receiver est enregistré à
+  l'import de ce module (PlaylistWatcherConfig.ready).
+- ``write_queue`` sérialise les écritures des tâches de fond (threads de scan,
+  tâches Celery) dans un unique thread écrivain : un seul writer par processus,
+  les autres processus attendent grâce au busy timeout au lieu d'échouer.
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.backends.signals import connection_created
+
+DEFAULT_SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": 20000,  # ms
+    "synchronous": "NORMAL",
+}
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Receiver de ``connection_created`` : applique les pragmas SQLite.
+    Ignore les autres moteurs de base de données.
+    """
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", DEFAULT_SQLITE_PRAGMAS)
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+connection_created.connect(apply_sqlite_pragmas, dispatch_uid="sqlite_pragmas")
+
+
+class WriteQueue:
+    """
+    File d'écriture à writer unique.
+    Chaque job soumis est exécuté dans sa propre transaction, l'un après l'autre,
+    par un thread dédié. ``submit`` retourne un ``Future`` ; ``run`` attend le résultat.
+    """
+
+    def __init__(self, name="db-writer"):
+        self.name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _worker(self):
+        while True:
+            func, args, kwargs, future = self._queue.get()
+            try:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                close_old_connections()
+                try:
+                    with transaction.atomic():
+                        result = func(*args, **kwargs)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    def submit(self, func, *args, **kwargs) -> Future:
+        """
+        Ajoute un lot d'écritures à la file.
+        ``func`` reçoit ``*args, **kwargs`` et s'exécute dans ``transaction.atomic()``.
+        """
+        future = Future()
+        self._ensure_started()
+        self._queue.put((func, args, kwargs, future))
+        return future
+
+    def run(self, func, *args, **kwargs):
+        """
+        Exécute un lot d'écritures via la file et retourne son résultat.
+        Si l'appelant est déjà le writer ou déjà dans une transaction,
+        le job est exécuté directement pour éviter un interblocage.
+        """
+        if threading.current_thread() is self._thread or connection.in_atomic_block:
+            with transaction.atomic():
+                return func(*args, **kwargs)
+        return self.submit(func, *args, **kwargs).result()
+
+    def join(self):
+        """Attend que tous les jobs soumis soient terminés."""
+        self._queue.join()
+
+
+write_queue = WriteQueue()
@@ -18,6 +18,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "playlistwatcher",
     "radioscraper",
     "tracker",
     "sslserver",
@@ -47,7 +48,15 @@ TEMPLATES = [{
 }]
 WSGI_APPLICATION = "playlistwatcher.wsgi.application"
 
-DATABASES = {"default":{"ENGINE":"django.db.backends.sqlite3","NAME": BASE_DIR/"db.sqlite3"}}
+DATABASES = {"default":{
+    "ENGINE":"django.db.backends.sqlite3",
+    "NAME": BASE_DIR/"db.sqlite3",
+    # Attente (s) sur un verrou avant "database is locked", et verrou d'écriture pris dès BEGIN
+    "OPTIONS": {"timeout": 20, "transaction_mode": "IMMEDIATE"},
+}}
+
+# Pragmas SQLite (WAL, busy timeout, synchronous) : DEFAULT_SQLITE_PRAGMAS dans
+# playlistwatcher/db.py, surchargeables par un réglage SQLITE_PRAGMAS.
 
 # Fichiers statiques et médias
 STATIC_URL = '/static/'
@@ -56,13 +65,38 @@ STATICFILES_DIRS = [
     BASE_DIR / 'tracker' / 'static',
 ]
 
-# # Celery settings pour test sans broker
-# CELERY_TASK_ALWAYS_EAGER = True
-# CELERY_TASK_EAGER_PROPAGATES = True
-#
-# # # Redis comme broker
-# # CELERY_BROKER_URL = "redis://localhost:6379/0"
-# # CELERY_RESULT_BACKEND = "redis://localhost:6379/0"
-#
-# # Pour éviter des résultats qui restent trop longtemps
-# CELERY_RESULT_EXPIRES = 3600  # 1h
+# Cache disque des exports générés en arrière-plan (tracker/utils/export_jobs.py)
+EXPORT_CACHE_DIR = BASE_DIR / "exports"
+
+# Cache des pages scrapées pour les emails des radios (radioscraper/page_cache.py)
+SCRAPE_CACHE_PATH = BASE_DIR / "scrape_cache.sqlite3"
+
+# API Radio Browser (radioscraper/radiobrowser.py) ; un serveur local de fixtures peut la remplacer
+RADIO_BROWSER_URL = os.getenv("RADIO_BROWSER_URL", "https://de1.api.radio-browser.info")
+
+# Tâches planifiées (commande run_scheduler, APScheduler)
+PLAYLIST_REFRESH_INTERVAL_HOURS = 6
+PLAYLIST_REFRESH_BUDGET = 2000  # appels API max par exécution
+PLAYLIST_REFRESH_WORKERS = 4  # appels Spotify concurrents du rafraîchissement
+SCAN_RESOLVE_LIMIT = 200  # titres et playlists temporaires résolus au début de chaque scan
+RADIO_SYNC_INTERVAL_HOURS = 24  # synchro delta des radios
+
+# Caches partagés entre processus (web, workers Celery)
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "progress": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache" / "progress",
+    },
+    # Options de la recherche de radios, reconstruites après chaque synchro (radioscraper/search.py)
+    "facets": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache" / "facets",
+        "TIMEOUT": None,
+    },
+}
+
+# Celery : sans broker configuré, l'actualisation des radios tourne dans des threads du processus web
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "")  # ex. redis://localhost:6379/0
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", CELERY_BROKER_URL)  # requis par les chords
+CELERY_RESULT_EXPIRES = 3600  # 1h
@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 class RadioscraperConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "radioscraper"
     verbose_name = "Radio Scraper"
+
+    def ready(self):
+        from .fts import install_fts_after_migrate
+        post_migrate.connect(install_fts_after_migrate, sender=self, dispatch_uid="radioscraper_fts")
@@ -0,0 +1,48 @@
+"""
+Lecture en streaming des dumps de stations Radio Browser.
+
+Formats acceptés, détectés au fil de la lecture : tableau JSON ([{...}, ...])
+ou NDJSON (un objet par ligne), éventuellement compressés en gzip (.gz).
+Le fichier est lu par blocs et décodé objet par objet (raw_decode) : la
+mémoire utilisée ne dépend que de la taille d'un objet, pas du fichier.
+"""
+import gzip
+import json
+
+READ_CHUNK_SIZE = 1024 * 1024
+MAX_RECORD_SIZE = 16 * 1024 * 1024  # au-delà, le fichier est jugé invalide
+_SEPARATORS = " \t\r\n,[]"
+
+_decoder = json.JSONDecoder()
+
+
+def open_dump(path):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8-sig")
+    return open(path, encoding="utf-8-sig")
+
+
+def iter_records(fp, chunk_size=READ_CHUNK_SIZE):
+    """Génère les objets JSON d'un fichier texte ouvert (tableau ou NDJSON)."""
+    buffer, pos, eof = "", 0, False
+    while True:
+        # Saut des séparateurs entre objets (blancs, virgules, crochets du tableau)
+        while pos < len(buffer) and buffer[pos] in _SEPARATORS:
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                return
+            buffer, pos = fp.read(chunk_size), 0
+            eof = not buffer
+            continue
+        try:
+            record, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof or len(buffer) - pos > MAX_RECORD_SIZE:
+                raise
+            # Objet coupé en fin de bloc : on complète le tampon
+            more = fp.read(chunk_size)
+            buffer, pos, eof = buffer[pos:] + more, 0, not more
+            continue
+        yield record
+        pos = end
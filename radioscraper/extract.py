@@ -0,0 +1,116 @@
+"""
+Extraction rapide des emails et du lien contact d'une page HTML, sans arbre DOM.
+
+- Le corps est lu en streaming et tronqué à MAX_PAGE_BYTES.
+- Un passage de désobfuscation ("[at]", "(dot)", "&#64;", ...) puis un seul
+  finditer sur un motif combiné : liens <a href> (mailto et candidats
+  "contact") et adresses email brutes.
+- Les faux positifs courants (image@2x.png, placeholders, etc.) sont filtrés.
+"""
+import re
+from urllib.parse import unquote
+
+MAX_PAGE_BYTES = 512 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+
+# Motifs ancrés sur leur premier caractère ("[", "(", "{", "&") : pas de tentative à chaque position
+_OBFUSCATED_RE = re.compile(
+    r"[\[\(\{]\s*(?:(?P<at>at|arobase)|dot)\s*[\]\)\}]\s*"
+    r"|(?P<at_entity>&#0*64;|&#x0*40;|&commat;)|&#0*46;|&period;",
+    re.IGNORECASE,
+)
+
+# Le lookbehind limite les tentatives au début de chaque mot
+_EMAIL_RE = re.compile(r"(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+# Lien <a href=...>texte</a> (groupes 1-3 : href, 4 : texte) ou email brut (groupe 5)
+_TOKEN_RE = re.compile(
+    r"""<a\s[^>]*?href\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))[^>]*>(.{0,300}?)</a\s*>"""
+    rf"|({_EMAIL_RE.pattern})",
+    re.IGNORECASE | re.DOTALL,
+)
+_SCALED_ASSET_RE = re.compile(r"\d+x")  # image@2x.png
+_TAG_RE = re.compile(r"<[^>]*>")
+
+CONTACT_WORDS = ("contact", "kontakt", "contacto", "contatti", "nous-joindre")
+JUNK_TLDS = {
+    "png", "jpg", "jpeg", "gif", "webp", "svg", "bmp", "ico", "tif", "tiff", "avif",
+    "css", "js", "json", "xml", "map", "woff", "woff2", "ttf", "eot",
+    "mp3", "mp4", "m4a", "ogg", "wav", "pdf", "zip",
+}
+JUNK_DOMAINS = {"example.com", "example.org", "domain.com", "email.com", "sentry.io", "wixpress.com", "yourdomain.com"}
+
+
+def read_capped(resp, max_bytes=MAX_PAGE_BYTES):
+    """Lit au plus max_bytes du corps d'une réponse requests ouverte en stream=True."""
+    chunks, size = [], 0
+    for chunk in resp.iter_content(READ_CHUNK_SIZE):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= max_bytes:
+            break
+    resp.close()
+    body = b"".join(chunks)[:max_bytes]
+    try:
+        return body.decode(resp.encoding or "utf-8", errors="replace")
+    except LookupError:  # charset déclaré inconnu de Python ("utf8mb4", ...)
+        try:
+            return body.decode(resp.apparent_encoding or "utf-8", errors="replace")
+        except LookupError:
+            return body.decode("utf-8", errors="replace")
+
+
+def deobfuscate(html):
+    """Ramène "nom [at] site (dot) fr", "&#64;", ... à une adresse lisible."""
+    parts, last = [], 0
+    for m in _OBFUSCATED_RE.finditer(html):
+        parts.append(html[last:m.start()].rstrip() if m.group(0)[0] in "[({" else html[last:m.start()])
+        parts.append("@" if m.group("at") or m.group("at_entity") else ".")
+        last = m.end()
+    if not parts:
+        return html
+    parts.append(html[last:])
+    return "".join(parts)
+
+
+def clean_email(candidate):
+    """Adresse normalisée, ou None si c'est un faux positif."""
+    email = candidate.strip().strip(".,;:").lower()
+    local, _, domain = email.partition("@")
+    if not local or "." not in domain or len(email) > 254:
+        return None
+    if domain.rsplit(".", 1)[-1] in JUNK_TLDS:
+        return None
+    if any(domain == d or domain.endswith("." + d) for d in JUNK_DOMAINS):
+        return None
+    if _SCALED_ASSET_RE.fullmatch(domain.split(".", 1)[0]):
+        return None
+    return email
+
+
+def extract_from_html(html):
+    """(ensemble d'emails, href du lien contact ou None) en un seul parcours."""
+    emails, contact_by_text, contact_by_href = set(), None, None
+    for m in _TOKEN_RE.finditer(deobfuscate(html)):
+        raw_email = m.group(5)
+        if raw_email:
+            email = clean_email(raw_email)
+            if email:
+                emails.add(email)
+            continue
+        href = (m.group(1) or m.group(2) or m.group(3) or "").strip()
+        text = m.group(4)
+        if href.lower().startswith("mailto:"):
+            for address in unquote(href[7:]).split("?", 1)[0].split(","):
+                email = clean_email(address)
+                if email:
+                    emails.add(email)
+            continue
+        # Emails affichés dans le texte du lien
+        emails.update(filter(None, map(clean_email, _EMAIL_RE.findall(text))))
+        if href.startswith("#") or href.lower().startswith("javascript:"):
+            continue
+        if contact_by_text is None and any(w in _TAG_RE.sub("", text).lower() for w in CONTACT_WORDS):
+            contact_by_text = href
+        elif contact_by_href is None and any(w in href.lower() for w in CONTACT_WORDS):
+            contact_by_href = href
+    return emails, contact_by_text or contact_by_href
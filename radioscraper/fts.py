@@ -0,0 +1,131 @@
+"""
+Recherche plein texte des radios (nom, tags, site web, emails).
+
+Sur SQLite, une table FTS5 à contenu externe (radioscraper_radio_fts) indexe
+les colonnes de radioscraper_radio. Des triggers AFTER INSERT / UPDATE /
+DELETE la tiennent à jour pour toutes les écritures, y compris les chemins
+bulk (INSERT ... ON CONFLICT, bulk_update, executemany) : aucun code
+applicatif n'a à y penser. Table et triggers sont créés après `migrate`
+(signal post_migrate) ; `rebuild_radio_fts` reconstruit l'index.
+
+Requête : chaque mot saisi devient un préfixe ("jazz*"), tous requis ;
+résultats triés par bm25, le nom pesant plus que les tags, puis le site et
+les emails. Sur les autres moteurs (ou sans FTS5), repli sur des icontains
+combinés, triés par nom.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Radio
+
+FTS_TABLE = "radioscraper_radio_fts"
+FTS_COLUMNS = ("name", "tags", "homepage", "emails")
+FTS_WEIGHTS = (10.0, 5.0, 2.0, 2.0)  # bm25, dans l'ordre de FTS_COLUMNS
+MAX_TERMS = 8
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+_available = {}
+
+
+def _schema_sql():
+    table = Radio._meta.db_table
+    columns = ", ".join(FTS_COLUMNS)
+    new_values = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+    old_values = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+    delete_old = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    insert_new = f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{columns}, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {columns} ON {table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def fts_supported(conn=connection):
+    return conn.vendor == "sqlite"
+
+
+def fts_available(conn=connection):
+    """Vrai si la table FTS existe sur cette base (résultat mémorisé par alias)."""
+    if not fts_supported(conn):
+        return False
+    if conn.alias not in _available:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _available[conn.alias] = cursor.fetchone() is not None
+    return _available[conn.alias]
+
+
+def rebuild_fts(conn=connection):
+    with conn.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def install_fts(conn=connection):
+    """Crée table et triggers s'ils manquent ; indexe l'existant à la création. Retourne True si créée."""
+    if not fts_supported(conn):
+        return False
+    _available.pop(conn.alias, None)
+    created = not fts_available(conn)
+    with conn.cursor() as cursor:
+        for statement in _schema_sql():
+            cursor.execute(statement)
+    if created:
+        rebuild_fts(conn)
+    _available[conn.alias] = True
+    return created
+
+
+def install_fts_after_migrate(sender, using="default", **kwargs):
+    """Receiver de post_migrate (app radioscraper)."""
+    from django.db import connections
+    try:
+        install_fts(connections[using])
+    except Exception as e:  # SQLite compilé sans FTS5 : la recherche se replie sur icontains
+        print(f"⚠️ Index plein texte des radios indisponible: {e}")
+
+
+def search_terms(text):
+    return _TERM_RE.findall(text or "")[:MAX_TERMS]
+
+
+def match_query(text):
+    """Requête FTS5 : chaque mot en préfixe, tous requis ; None si aucun mot."""
+    terms = search_terms(text)
+    if not terms:
+        return None
+    return " ".join('"{}"*'.format(t.replace('"', '""')) for t in terms)
+
+
+def search_radios(text, radios=None):
+    """
+    Filtre un queryset de Radio par texte. Retourne (queryset, ranked) :
+    ranked indique un tri par pertinence (FTS5) plutôt que par nom.
+    """
+    radios = Radio.objects.all() if radios is None else radios
+    query = match_query(text)
+    if query is None:
+        return radios, False
+    if fts_available():
+        weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+        table = Radio._meta.db_table
+        ranked = radios.extra(
+            tables=[FTS_TABLE],
+            # "+" : rowid inutilisable comme contrainte, la table FTS reste la boucle externe
+            # (sinon le COUNT, sans ORDER BY, peut relancer le MATCH pour chaque radio filtrée)
+            where=[f"{FTS_TABLE} MATCH %s", f"+{FTS_TABLE}.rowid = {table}.id"],
+            params=[query],
+            select={"fts_rank": f"bm25({FTS_TABLE}, {weights})"},
+            order_by=["fts_rank", f"{table}.name"],
+        )
+        return ranked, True
+    for term in search_terms(text):
+        radios = radios.filter(
+            Q(name__icontains=term) | Q(tags__icontains=term) | Q(homepage__icontains=term) | Q(emails__icontains=term)
+        )
+    return radios, False
@@ -0,0 +1,64 @@
+import re
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from django.core.management.base import BaseCommand
+
+from radioscraper.extract import extract_from_html
+
+FIXTURES_DIR = Path(__file__).resolve().parents[2] / "bench_fixtures"
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+
+
+def soup_extract(html, url="https://radio.example/"):
+    """Ancien chemin : regex sur le texte + deux analyses BeautifulSoup (mailto, puis lien contact)."""
+    emails = set(EMAIL_RE.findall(html))
+    soup = BeautifulSoup(html, "html.parser")
+    for a in soup.find_all("a", href=True):
+        if a["href"].startswith("mailto:"):
+            emails.add(a["href"].replace("mailto:", "").strip())
+    contact = None
+    soup = BeautifulSoup(html, "html.parser")
+    for a in soup.find_all("a", href=True):
+        if "contact" in a.get_text(strip=True).lower():
+            contact = urljoin(url, a["href"])
+            break
+    return emails, contact
+
+
+class Command(BaseCommand):
+    help = "Compare l'extracteur d'emails (radioscraper/extract.py) à l'ancien chemin BeautifulSoup sur des pages HTML enregistrées."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--corpus", default=str(FIXTURES_DIR), help="Dossier de fichiers .html à analyser.")
+        parser.add_argument("--repeat", type=int, default=20, help="Nombre de passages par page.")
+        parser.add_argument("--scale", type=int, default=1, help="Duplique le corps de chaque page N fois (grosses pages).")
+
+    def handle(self, *args, **opts):
+        pages = sorted(Path(opts["corpus"]).glob("*.html"))
+        if not pages:
+            self.stdout.write(self.style.ERROR(f"Aucun fichier .html dans {opts['corpus']}"))
+            return
+
+        self.stdout.write(f"{'page':28} {'Ko':>7} {'soup ms':>9} {'extract ms':>11} {'gain':>6}  emails soup / extract")
+        total_soup = total_fast = 0.0
+        for path in pages:
+            html = path.read_text(encoding="utf-8", errors="replace") * opts["scale"]
+            results = {}
+            for name, func in (("soup", soup_extract), ("fast", extract_from_html)):
+                start = time.perf_counter()
+                for _ in range(opts["repeat"]):
+                    results[name] = func(html)
+                results[name + "_ms"] = (time.perf_counter() - start) * 1000 / opts["repeat"]
+            total_soup += results["soup_ms"]
+            total_fast += results["fast_ms"]
+            self.stdout.write(
+                f"{path.name[:28]:28} {len(html.encode()) / 1024:7.1f} {results['soup_ms']:9.2f} "
+                f"{results['fast_ms']:11.2f} {results['soup_ms'] / max(results['fast_ms'], 1e-9):5.1f}x  "
+                f"{len(results['soup'][0])} / {len(results['fast'][0])}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Total : soup {total_soup:.2f} ms, extract {total_fast:.2f} ms ({total_soup / max(total_fast, 1e-9):.1f}x)"
+        ))
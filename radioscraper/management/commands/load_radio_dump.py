@@ -0,0 +1,94 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from playlistwatcher.db import write_queue
+from radioscraper.dump import iter_records, open_dump
+from radioscraper.models import SyncCheckpoint
+from radioscraper.radiobrowser import station_changed_at
+from radioscraper.search import refresh_facet_cache
+from radioscraper.utils import sync_stations
+
+LOAD_BATCH_SIZE = 5000
+
+
+def _load_batch(batch):
+    """Un lot = une transaction (exécuté par le writer unique)."""
+    with transaction.atomic():
+        created, updated, unchanged = sync_stations(batch)
+    return len(created), len(updated), len(unchanged)
+
+
+class Command(BaseCommand):
+    help = "Charge la table Radio depuis un dump de stations Radio Browser (tableau JSON ou NDJSON, .gz accepté)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Fichier de dump (.json, .ndjson, éventuellement .gz).")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=LOAD_BATCH_SIZE,
+            help="Stations écrites par transaction.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            action="store_true",
+            help="Enregistre le lastchangetime le plus récent comme point de reprise global de sync_radios.",
+        )
+
+    def handle(self, *args, **opts):
+        batch_size = max(1, opts["batch_size"])
+        totals = {"read": 0, "created": 0, "updated": 0, "unchanged": 0, "invalid": 0}
+        newest = None
+        started = time.monotonic()
+
+        # Lecture/décodage du lot suivant pendant que le writer écrit le précédent
+        pending = None
+
+        def collect(future):
+            created, updated, unchanged = future.result()
+            totals["created"] += created
+            totals["updated"] += updated
+            totals["unchanged"] += unchanged
+            rate = totals["read"] / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f"\r{totals['read']} lues - {rate:,.0f} lignes/s ", ending="")
+            self.stdout.flush()
+
+        try:
+            with open_dump(opts["path"]) as fp:
+                batch = []
+                for record in iter_records(fp):
+                    if not isinstance(record, dict) or not record.get("stationuuid"):
+                        totals["invalid"] += 1
+                        continue
+                    totals["read"] += 1
+                    if opts["checkpoint"]:
+                        changed = station_changed_at(record)
+                        if changed and (newest is None or changed > newest):
+                            newest = changed
+                    batch.append(record)
+                    if len(batch) >= batch_size:
+                        if pending:
+                            collect(pending)
+                        pending, batch = write_queue.submit(_load_batch, batch), []
+                if pending:
+                    collect(pending)
+                if batch:
+                    collect(write_queue.submit(_load_batch, batch))
+        except OSError as e:
+            raise CommandError(f"Lecture impossible : {e}")
+        except ValueError as e:
+            raise CommandError(f"Dump invalide après {totals['read']} stations : {e}")
+
+        if newest is not None:
+            write_queue.run(lambda: SyncCheckpoint.objects.update_or_create(country="", defaults={"last_change": newest}))
+
+        elapsed = time.monotonic() - started
+        refresh_facet_cache()
+        self.stdout.write("")
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['read']} stations en {elapsed:.1f}s ({totals['read'] / max(elapsed, 1e-6):,.0f} lignes/s) : "
+            f"{totals['created']} créées, {totals['updated']} mises à jour, {totals['unchanged']} inchangées, "
+            f"{totals['invalid']} ignorées"
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from playlistwatcher.db import write_queue
+from radioscraper.fts import fts_supported, install_fts, rebuild_fts
+
+
+class Command(BaseCommand):
+    help = "Crée si besoin puis reconstruit l'index plein texte des radios (SQLite FTS5)."
+
+    def handle(self, *args, **opts):
+        if not fts_supported():
+            raise CommandError("L'index plein texte n'existe que sur SQLite ; les autres moteurs utilisent icontains.")
+
+        def rebuild():
+            if not install_fts():
+                rebuild_fts()
+
+        write_queue.run(rebuild)
+        self.stdout.write(self.style.SUCCESS("Index plein texte des radios reconstruit."))
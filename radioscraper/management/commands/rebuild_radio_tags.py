@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from playlistwatcher.db import write_queue
+from radioscraper.search import refresh_facet_cache
+from radioscraper.tags import rebuild_tag_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index normalisé des tags (Tag / RadioTag) à partir de Radio.tags."
+
+    def handle(self, *args, **opts):
+        radios, pruned = write_queue.run(rebuild_tag_index)
+        refresh_facet_cache()
+        self.stdout.write(self.style.SUCCESS(f"{radios} radios indexées, {pruned} tags orphelins supprimés."))
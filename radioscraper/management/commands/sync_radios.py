@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from radioscraper.radiobrowser import FETCH_WORKERS
+from radioscraper.search import refresh_facet_cache
+from radioscraper.utils import sync_country
+
+
+class Command(BaseCommand):
+    help = "Synchronise les radios depuis Radio Browser (delta depuis le dernier passage par défaut)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--country",
+            action="append",
+            default=[],
+            help="Pays à synchroniser (répétable). Par défaut : toutes les stations.",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Relit toutes les stations au lieu des seules stations modifiées.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=FETCH_WORKERS,
+            help="Nombre de pages téléchargées en parallèle.",
+        )
+
+    def handle(self, *args, **opts):
+        for country in opts["country"] or [None]:
+            started = time.monotonic()
+            stats = sync_country(country, delta=not opts["full"], workers=opts["workers"])
+            since = f" (depuis {stats['since']:%Y-%m-%d %H:%M})" if stats["since"] else ""
+            self.stdout.write(self.style.SUCCESS(
+                f"{country or 'Tous pays'}{since} : {stats['fetched']} lues, {stats['created']} créées, "
+                f"{stats['updated']} mises à jour en {time.monotonic() - started:.1f}s"
+            ))
+        refresh_facet_cache()
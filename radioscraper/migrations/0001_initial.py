@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Radio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stationuuid', models.CharField(max_length=50, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('country', models.CharField(blank=True, max_length=100, null=True)),
+                ('state', models.CharField(blank=True, max_length=255, null=True)),
+                ('tags', models.CharField(blank=True, max_length=500, null=True)),
+                ('homepage', models.URLField(blank=True, null=True)),
+                ('stream_url', models.URLField(blank=True, null=True)),
+                ('emails', models.TextField(blank=True, null=True)),
+                ('favicon', models.URLField(blank=True)),
+                ('language', models.CharField(blank=True, max_length=50)),
+                ('content_hash', models.CharField(blank=True, default='', max_length=40)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SyncCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('country', models.CharField(max_length=100, unique=True)),
+                ('last_change', models.DateTimeField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RadioTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('radio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='radio_tags', to='radioscraper.radio')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='radio_tags', to='radioscraper.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='radio',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, related_name='radios', through='radioscraper.RadioTag', to='radioscraper.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='radiotag',
+            index=models.Index(fields=['tag', 'radio'], name='radioscrape_tag_id_a1dff2_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='radiotag',
+            unique_together={('radio', 'tag')},
+        ),
+        migrations.AddIndex(
+            model_name='radio',
+            index=models.Index(fields=['country', 'state'], name='radioscrape_country_efadef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='radio',
+            index=models.Index(fields=['state'], name='radioscrape_state_dad135_idx'),
+        ),
+    ]
@@ -12,6 +12,42 @@ class Radio(models.Model):
     emails = models.TextField(blank=True, null=True)
     favicon = models.URLField(blank=True)
     language = models.CharField(max_length=50, blank=True)
+    content_hash = models.CharField(max_length=40, blank=True, default="")  # empreinte des champs synchronisés
+    updated_at = models.DateTimeField(auto_now=True, null=True, db_index=True)  # curseur des exports incrémentaux
+    tag_set = models.ManyToManyField("Tag", through="RadioTag", related_name="radios", blank=True)  # index de `tags`
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["country", "state"]),
+            models.Index(fields=["state"]),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class Tag(models.Model):
+    """Tag normalisé (minuscules, sans espaces superflus) extrait de Radio.tags."""
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class RadioTag(models.Model):
+    radio = models.ForeignKey(Radio, on_delete=models.CASCADE, related_name="radio_tags")
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name="radio_tags")
+
+    class Meta:
+        unique_together = ("radio", "tag")
+        indexes = [models.Index(fields=["tag", "radio"])]
+
+
+class SyncCheckpoint(models.Model):
+    """Point de reprise de la synchro delta Radio Browser, par pays ("" = tous)."""
+    country = models.CharField(max_length=100, unique=True)
+    last_change = models.DateTimeField(null=True, blank=True)  # lastchangetime le plus récent lu, borné au début de la passe
+    synced_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.country or 'Tous'}: {self.last_change}"
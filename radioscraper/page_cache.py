@@ -0,0 +1,133 @@
+"""
+Cache disque des pages scrapées (fichier SQLite distinct de la base Django).
+
+Par URL, on ne garde pas le corps de la page mais :
+- ETag / Last-Modified, renvoyés en requête conditionnelle (304 = inchangé)
+- les emails et le lien contact extraits
+- une date d'expiration pour les pages en erreur (cache négatif)
+
+Par hôte, les erreurs réseau / timeouts / 5xx déclenchent un backoff
+exponentiel : l'hôte n'est plus contacté avant `retry_at`.
+"""
+import json
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+FRESH_TTL = 3600  # s : page relue récemment → pas de requête
+NEGATIVE_TTL = 24 * 3600  # s : page en 4xx
+BACKOFF_BASE = 300  # s, doublé à chaque échec consécutif
+BACKOFF_MAX = 7 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    emails TEXT NOT NULL DEFAULT '[]',
+    contact_href TEXT,
+    checked_at REAL NOT NULL,
+    error_until REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS hosts (
+    host TEXT PRIMARY KEY,
+    failures INTEGER NOT NULL DEFAULT 0,
+    retry_at REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+def host_of(url):
+    return (urlsplit(url).hostname or "").lower()
+
+
+class PageCache:
+    """Une connexion SQLite par thread ; écritures courtes en autocommit."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._ready = False
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=20, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._ready:
+                    conn.executescript(_SCHEMA)
+                    self._ready = True
+            self._local.conn = conn
+        return conn
+
+    def get(self, url):
+        row = self._conn().execute(
+            "SELECT etag, last_modified, emails, contact_href, checked_at, error_until FROM pages WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, emails, contact_href, checked_at, error_until = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "emails": set(json.loads(emails)),
+            "contact_href": contact_href,
+            "checked_at": checked_at,
+            "error_until": error_until,
+        }
+
+    def store(self, url, emails, contact_href, etag=None, last_modified=None):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO pages (url, etag, last_modified, emails, contact_href, checked_at, error_until) "
+            "VALUES (?, ?, ?, ?, ?, ?, 0)",
+            (url, etag, last_modified, json.dumps(sorted(emails)), contact_href, time.time()),
+        )
+
+    def touch(self, url):
+        self._conn().execute("UPDATE pages SET checked_at = ?, error_until = 0 WHERE url = ?", (time.time(), url))
+
+    def mark_page_error(self, url, ttl=NEGATIVE_TTL):
+        """Page introuvable : les infos déjà extraites sont conservées, la page n'est plus relue avant ttl."""
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO pages (url, checked_at, error_until) VALUES (?, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET checked_at = excluded.checked_at, error_until = excluded.error_until",
+            (url, now, now + ttl),
+        )
+
+    def host_blocked(self, url):
+        row = self._conn().execute("SELECT retry_at FROM hosts WHERE host = ?", (host_of(url),)).fetchone()
+        return bool(row and row[0] > time.time())
+
+    def host_failed(self, url):
+        conn = self._conn()
+        host = host_of(url)
+        row = conn.execute("SELECT failures FROM hosts WHERE host = ?", (host,)).fetchone()
+        failures = (row[0] if row else 0) + 1
+        delay = min(BACKOFF_BASE * 2 ** (failures - 1), BACKOFF_MAX)
+        conn.execute(
+            "INSERT OR REPLACE INTO hosts (host, failures, retry_at) VALUES (?, ?, ?)",
+            (host, failures, time.time() + delay),
+        )
+
+    def host_ok(self, url):
+        self._conn().execute("DELETE FROM hosts WHERE host = ?", (host_of(url),))
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache(getattr(settings, "SCRAPE_CACHE_PATH", settings.BASE_DIR / "scrape_cache.sqlite3"))
+        return _cache
@@ -0,0 +1,244 @@
+"""
+Pipeline d'actualisation des radios, hors requête HTTP.
+
+1. Une sous-tâche par pays : stations lues page par page et écrites en bulk
+   (delta depuis le dernier passage, complet avec force) ; elle retourne les
+   radios dont les emails sont à scraper.
+2. Une sous-tâche par tranche de SCRAPE_CHUNK_SIZE radios : scraping des
+   emails en parallèle, puis écriture groupée.
+
+Chaque sous-tâche écrit sa progression sous sa propre clé du cache
+"progress" (partagé entre processus) : pas d'écriture concurrente sur une
+même clé ; refresh_progress() agrège les parties pour le polling du front.
+Une sous-tâche en erreur est notée dans sa partie, sans bloquer les suivantes.
+
+Exécuté par Celery (radioscraper/tasks.py, group + chord) si un broker est
+configuré, sinon par un pool de threads du processus web.
+"""
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from playlistwatcher.db import write_queue
+
+from .models import Radio
+from .radiobrowser import country_station_count
+from .scraping import scrape_many
+from .search import refresh_facet_cache
+from .utils import merge_emails, sync_country
+
+SCRAPE_CHUNK_SIZE = 200
+PIPELINE_WORKERS = 4  # sous-tâches simultanées sans Celery
+PROGRESS_TIMEOUT = 6 * 3600
+MESSAGES_KEPT = 5
+
+
+def progress_cache():
+    return caches["progress" if "progress" in settings.CACHES else "default"]
+
+
+def _root_key(task_id):
+    return f"radio_refresh_{task_id}"
+
+
+def _part_key(task_id, part):
+    return f"radio_refresh_{task_id}_{part}"
+
+
+def _update_root(task_id, **changes):
+    """Seules les étapes successives (lancement, plan du scraping, fin) écrivent la racine."""
+    root = progress_cache().get(_root_key(task_id)) or {}
+    root.update(changes)
+    progress_cache().set(_root_key(task_id), root, PROGRESS_TIMEOUT)
+
+
+def _set_part(task_id, part, state):
+    progress_cache().set(_part_key(task_id, part), state, PROGRESS_TIMEOUT)
+
+
+def _new_part(label, total=0):
+    return {"label": label, "processed": 0, "total": total, "created": 0, "updated": 0, "scraped": 0,
+            "messages": [], "done": False, "error": None}
+
+
+def _fail_part(task_id, part, state, e):
+    print(f"Erreur actualisation radios ({state['label']}): {e}")
+    traceback.print_exc()
+    state["error"] = str(e)
+    state["messages"] = (state["messages"] + [f"Erreur ({state['label']}) : {e}"])[-MESSAGES_KEPT:]
+    state["done"] = True
+    _set_part(task_id, part, state)
+
+
+def init_refresh(countries, force=False):
+    task_id = uuid.uuid4().hex
+    countries = list(countries) or [None]
+    _update_root(
+        task_id,
+        countries=countries,
+        force=force,
+        stage="fetch",
+        parts=[f"country-{i}" for i in range(len(countries))],
+        finished=False,
+    )
+    for i, country in enumerate(countries):
+        _set_part(task_id, f"country-{i}", _new_part(country or "Tous pays"))
+    return task_id, countries
+
+
+def scrape_candidates(country, force=False):
+    """pk des radios du pays ayant un site web (sans email, sauf force)."""
+    radios = Radio.objects.exclude(homepage__isnull=True).exclude(homepage="")
+    if country:
+        radios = radios.filter(country=country)
+    if not force:
+        radios = radios.filter(Q(emails__isnull=True) | Q(emails=""))
+    return list(radios.order_by("pk").values_list("pk", flat=True))
+
+
+def sync_country_part(task_id, index, country, force=False):
+    """Étape 1 pour un pays ; retourne les pk à scraper."""
+    part = f"country-{index}"
+    state = _new_part(country or "Tous pays")
+    try:
+        if force:
+            try:
+                state["total"] = country_station_count(country)
+            except requests.RequestException:
+                pass
+        _set_part(task_id, part, state)
+
+        def on_page(stats, messages):
+            state.update(processed=stats["fetched"], created=stats["created"], updated=stats["updated"])
+            state["total"] = max(state["total"], stats["fetched"])
+            state["messages"] = (state["messages"] + messages)[-MESSAGES_KEPT:]
+            _set_part(task_id, part, state)
+
+        sync_country(country, delta=not force, on_page=on_page)
+        candidates = scrape_candidates(country, force)
+        state.update(total=state["processed"], done=True)
+        _set_part(task_id, part, state)
+        return candidates
+    except Exception as e:
+        _fail_part(task_id, part, state, e)
+        return []
+
+
+def plan_scrape(task_id, candidate_lists):
+    """Découpe les radios à scraper en tranches et déclare leurs parties."""
+    pks = sorted({pk for candidates in candidate_lists for pk in candidates})
+    chunks = [pks[i:i + SCRAPE_CHUNK_SIZE] for i in range(0, len(pks), SCRAPE_CHUNK_SIZE)]
+    root = progress_cache().get(_root_key(task_id)) or {}
+    parts = [p for p in root.get("parts", []) if p.startswith("country-")]
+    parts += [f"scrape-{i}" for i in range(len(chunks))]
+    for i, chunk in enumerate(chunks):
+        _set_part(task_id, f"scrape-{i}", _new_part("Emails", total=len(chunk)))
+    _update_root(task_id, stage="scrape", parts=parts)
+    return chunks
+
+
+def _write_emails(radios):
+    Radio.objects.bulk_update(radios, ["emails", "updated_at"], batch_size=500)
+
+
+def scrape_part(task_id, index, pks):
+    """Étape 2 : emails d'une tranche de radios, écrits d'un bloc."""
+    part = f"scrape-{index}"
+    state = _new_part("Emails", total=len(pks))
+    try:
+        radios = list(Radio.objects.filter(pk__in=pks).only("pk", "name", "homepage", "emails"))
+        scraped = scrape_many(r.homepage for r in radios)
+        now = timezone.now()
+        changed = []
+        for radio in radios:
+            emails = merge_emails(radio.emails, *scraped.get(radio.homepage, ()))
+            if emails != (radio.emails or ""):
+                radio.emails, radio.updated_at = emails, now
+                changed.append(radio)
+        if changed:
+            write_queue.run(_write_emails, changed)
+        state.update(processed=len(pks), scraped=len(changed), done=True)
+        state["messages"] = [f"Emails trouvés : {r.name}" for r in changed][-MESSAGES_KEPT:]
+        _set_part(task_id, part, state)
+    except Exception as e:
+        _fail_part(task_id, part, state, e)
+
+
+def finish_refresh(task_id):
+    try:
+        refresh_facet_cache()
+    finally:
+        _update_root(task_id, stage="done", finished=True)
+
+
+def refresh_progress(task_id):
+    """État agrégé d'une actualisation (format attendu par radio_select.js), ou None."""
+    root = progress_cache().get(_root_key(task_id))
+    if root is None:
+        return None
+    keys = [_part_key(task_id, p) for p in root.get("parts", [])]
+    found = progress_cache().get_many(keys)
+    parts = [found[k] for k in keys if k in found]
+
+    data = {"processed": 0, "total": 0, "created": 0, "updated": 0, "scraped": 0}
+    for state in parts:
+        for field in data:
+            data[field] += state[field]
+    messages = [m for state in parts for m in state["messages"]]
+    errors = [state["error"] for state in parts if state["error"]]
+
+    if root.get("finished"):
+        current = None
+    elif root.get("stage") == "scrape":
+        chunks = [s for s in parts if s["label"] == "Emails"]
+        current = f"emails des sites ({sum(s['done'] for s in chunks)}/{len(chunks)} lots)"
+    else:
+        current = ", ".join(s["label"] for s in parts if not s["done"]) or None
+    return {
+        **data,
+        "stage": root.get("stage"),
+        "messages": messages[-MESSAGES_KEPT:],
+        "errors": errors,
+        "current_country": current,
+        "finished": bool(root.get("finished")),
+    }
+
+
+def run_refresh_threaded(task_id, countries, force=False):
+    """Même pipeline sans Celery : étapes exécutées par un pool de threads."""
+
+    def in_thread(func, *args):
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+
+    try:
+        with ThreadPoolExecutor(max_workers=PIPELINE_WORKERS) as pool:
+            candidates = list(pool.map(
+                lambda item: in_thread(sync_country_part, task_id, item[0], item[1], force), enumerate(countries)
+            ))
+            chunks = plan_scrape(task_id, candidates)
+            list(pool.map(lambda item: in_thread(scrape_part, task_id, *item), enumerate(chunks)))
+    finally:
+        finish_refresh(task_id)
+        close_old_connections()
+
+
+def start_refresh(countries, force=False):
+    """Lance l'actualisation en arrière-plan et retourne aussitôt son identifiant."""
+    task_id, countries = init_refresh(countries, force)
+    if getattr(settings, "CELERY_BROKER_URL", ""):
+        from .tasks import refresh_radios_task
+        refresh_radios_task.delay(task_id, countries, force)
+    else:
+        threading.Thread(target=run_refresh_threaded, args=(task_id, countries, force), daemon=True).start()
+    return task_id
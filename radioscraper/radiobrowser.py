@@ -0,0 +1,132 @@
+"""
+Accès à l'API Radio Browser : stations par pages, en streaming.
+
+- Les pages sont téléchargées en parallèle (fenêtre glissante de FETCH_WORKERS
+  requêtes) mais rendues dans l'ordre, une liste à la fois : l'appelant écrit
+  chaque page sans garder tout le pays en mémoire.
+- Synchro delta : tri par lastchangetime décroissant, la lecture s'arrête à
+  la première station modifiée avant le point de reprise.
+- Passe complète : tri par stationuuid, stable pendant la passe (une station
+  modifiée entre deux pages ne change pas de rang, donc aucune n'est sautée
+  ni lue deux fois à cause d'elle).
+- L'URL de base (settings.RADIO_BROWSER_URL) peut pointer vers un serveur
+  local qui sert des fixtures JSON (voir radioscraper/tests.py).
+"""
+import datetime
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_URL = "https://de1.api.radio-browser.info"
+PAGE_SIZE = 1000
+FETCH_WORKERS = 4
+REQUEST_TIMEOUT = (5, 30)  # connexion, lecture (s)
+COUNT_CACHE_TIMEOUT = 3600
+HEADERS = {"User-Agent": "playlistwatcher/radioscraper"}
+
+_local = threading.local()
+
+
+def api_url(path):
+    return getattr(settings, "RADIO_BROWSER_URL", DEFAULT_URL).rstrip("/") + path
+
+
+def get_session():
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        _local.session = session
+    return session
+
+
+def station_changed_at(station):
+    """Date de dernière modification d'une station (aware), ou None."""
+    value = station.get("lastchangetime_iso8601") or station.get("lastchangetime") or ""
+    try:
+        changed = parse_datetime(value.strip().replace(" ", "T"))
+    except ValueError:
+        return None
+    if changed is not None and timezone.is_naive(changed):
+        changed = timezone.make_aware(changed, datetime.timezone.utc)
+    return changed
+
+
+def fetch_page(country=None, offset=0, limit=PAGE_SIZE, recent_first=False):
+    """Une page de stations, par stationuuid ou (recent_first) les plus récemment modifiées d'abord."""
+    params = {"hidebroken": "false", "offset": offset, "limit": limit}
+    if recent_first:
+        params.update(order="lastchangetime", reverse="true")
+    else:
+        params.update(order="stationuuid", reverse="false")
+    if country:
+        params.update(country=country, countryExact="true")
+    response = get_session().get(api_url("/json/stations/search"), params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+def iter_station_pages(country=None, since=None, page_size=PAGE_SIZE, workers=FETCH_WORKERS):
+    """
+    Génère les pages de stations (listes non vides) dans l'ordre.
+    since : ne renvoie que les stations modifiées depuis cette date (sinon
+    passe complète, triée par stationuuid).
+    """
+    workers = max(1, workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        next_offset = 0
+
+        def submit():
+            nonlocal next_offset
+            pending.append(pool.submit(fetch_page, country, next_offset, page_size, since is not None))
+            next_offset += page_size
+
+        # En delta, l'essentiel tient souvent en une page : démarrage à une requête, doublé à chaque page pleine
+        window = 1 if since is not None else workers
+        for _ in range(window):
+            submit()
+        try:
+            while pending:
+                page = pending.popleft().result()
+                last = len(page) < page_size
+                if since is not None:
+                    for i, station in enumerate(page):
+                        changed = station_changed_at(station)
+                        if changed is not None and changed < since:
+                            page, last = page[:i], True
+                            break
+                if page:
+                    yield page
+                if last:
+                    break
+                window = min(workers, window * 2)
+                while len(pending) < window:
+                    submit()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def country_station_count(country=None):
+    """Nombre de stations annoncé par l'API (mis en cache)."""
+    key = f"radiobrowser_count_{country or ''}"
+    count = cache.get(key)
+    if count is None:
+        if country:
+            response = get_session().get(api_url(f"/json/countries/{quote(country)}"), timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            count = sum(c.get("stationcount", 0) for c in response.json() if c.get("name") == country)
+        else:
+            response = get_session().get(api_url("/json/stats"), timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            count = response.json().get("stations", 0)
+        cache.set(key, count, COUNT_CACHE_TIMEOUT)
+    return count
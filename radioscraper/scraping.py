@@ -0,0 +1,162 @@
+"""
+Moteur de scraping des emails des radios (page d'accueil + page contact).
+
+- Pool de threads borné ; une session requests par thread (connexions
+  réutilisées d'une page à l'autre).
+- Plafond de requêtes simultanées par hôte, pour ne pas marteler un même site.
+- Chaque page n'est téléchargée qu'une fois, tronquée à MAX_PAGE_BYTES :
+  emails, liens mailto et lien "contact" sont extraits de la même réponse
+  (radioscraper/extract.py, sans arbre BeautifulSoup).
+- Les URLs identiques (radios d'un même groupe) ne sont scrapées qu'une fois.
+- Cache disque (radioscraper/page_cache.py) : requêtes conditionnelles,
+  emails extraits conservés, backoff des hôtes en erreur.
+- Aucune écriture en base ici : l'appelant écrit les résultats en bulk.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .extract import extract_from_html, read_capped
+from .page_cache import FRESH_TTL, get_page_cache
+
+SCRAPE_WORKERS = 16
+SCRAPE_WINDOW = 500  # stations scrapées ensemble avant écriture
+PER_HOST_LIMIT = 2
+REQUEST_TIMEOUT = (5, 10)  # connexion, lecture (s)
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+_local = threading.local()
+_host_locks = {}  # hôte → [sémaphore, utilisateurs]
+_host_locks_guard = threading.Lock()
+
+
+def get_session():
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=PER_HOST_LIMIT * 4, pool_maxsize=PER_HOST_LIMIT)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _local.session = session
+    return session
+
+
+@contextmanager
+def host_slot(url):
+    """
+    Limite les requêtes simultanées vers l'hôte de l'URL (PER_HOST_LIMIT).
+    Le sémaphore d'un hôte n'existe que tant qu'un thread l'utilise ou
+    l'attend : la table ne grossit pas avec le nombre d'hôtes scrapés.
+    """
+    host = (urlsplit(url).hostname or "").lower()
+    with _host_locks_guard:
+        slot = _host_locks.get(host)
+        if slot is None:
+            slot = _host_locks[host] = [threading.BoundedSemaphore(PER_HOST_LIMIT), 0]
+        slot[1] += 1  # utilisateurs en cours ou en attente
+    try:
+        with slot[0]:
+            yield
+    finally:
+        with _host_locks_guard:
+            slot[1] -= 1
+            if not slot[1]:
+                del _host_locks[host]
+
+
+def fetch_extracted(url, cache=None):
+    """
+    (emails, lien contact) d'une page, via le cache disque :
+    - page vérifiée il y a moins de FRESH_TTL, ou en cache négatif → cache seul
+    - hôte en backoff → cache seul (None si jamais vu)
+    - sinon GET conditionnel ; 304 → résultat en cache
+    """
+    cache = cache or get_page_cache()
+    entry = cache.get(url)
+    now = time.time()
+    cached = (entry["emails"], entry["contact_href"]) if entry else None
+    if entry and (entry["error_until"] > now or entry["checked_at"] > now - FRESH_TTL):
+        return cached
+    if cache.host_blocked(url):
+        return cached
+
+    headers = {}
+    if entry and entry["etag"]:
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry["last_modified"]:
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    html = ""
+    with host_slot(url):
+        try:
+            resp = get_session().get(url, timeout=REQUEST_TIMEOUT, headers=headers, stream=True)
+            if 200 <= resp.status_code < 300:
+                html = read_capped(resp)
+            else:
+                resp.close()
+        except requests.RequestException as e:
+            print(f"⚠️ Impossible de récupérer {url}: {e}")
+            cache.host_failed(url)
+            return cached
+
+    if resp.status_code == 304 and entry:
+        cache.touch(url)
+        cache.host_ok(url)
+        return cached
+    if resp.status_code >= 500:
+        print(f"⚠️ Impossible de récupérer {url}: HTTP {resp.status_code}")
+        cache.host_failed(url)
+        return cached
+    cache.host_ok(url)
+    if resp.status_code >= 400:
+        cache.mark_page_error(url)
+        return cached
+
+    emails, contact_href = extract_from_html(html)
+    cache.store(url, emails, contact_href, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+    return emails, contact_href
+
+
+def scrape_homepage(url):
+    """Emails de la page d'accueil et de sa page contact (chacune téléchargée une fois)."""
+    if not url:
+        return set()
+    extracted = fetch_extracted(url)
+    if extracted is None:
+        return set()
+    emails, contact_href = extracted
+    emails = set(emails)
+    if contact_href:
+        contact_url = urljoin(url, contact_href)
+        if contact_url.split("#")[0] != url.split("#")[0]:
+            contact = fetch_extracted(contact_url)
+            if contact is not None:
+                emails |= contact[0]
+    return emails
+
+
+def _scrape_safely(url):
+    """scrape_homepage sans exception : une page en erreur ne doit pas interrompre le lot."""
+    try:
+        return scrape_homepage(url)
+    except Exception as e:
+        print(f"⚠️ Erreur de scraping pour {url}: {e}")
+        return set()
+
+
+def scrape_many(urls, workers=SCRAPE_WORKERS):
+    """
+    Scrape un ensemble d'URLs en parallèle.
+    Retourne {url: ensemble d'emails} (URLs dédupliquées ; ensemble vide si une URL échoue).
+    """
+    urls = list(dict.fromkeys(u for u in urls if u))
+    if not urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(urls))) as pool:
+        return dict(zip(urls, pool.map(_scrape_safely, urls)))
@@ -0,0 +1,94 @@
+"""
+Filtres et facettes de la recherche de radios.
+
+- Pays / région : égalité sur des colonnes indexées.
+- Tags : jointure sur l'index RadioTag (sémantique exacte : une radio
+  correspond si elle porte au moins un des tags choisis), en sous-requête
+  pour éviter DISTINCT.
+- Facettes : un GROUP BY par dimension. Chaque dimension est comptée avec
+  les filtres des autres dimensions seulement, pour que le choix d'un pays
+  n'efface pas les autres pays de la liste.
+- Options des listes de la page de recherche : instantané des facettes
+  globales dans un cache partagé, reconstruit après chaque synchro (la page
+  ne lit qu'une clé).
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Radio, RadioTag
+from .tags import parse_tags
+
+FACET_LIMIT = 500
+FILTER_PARAMS = {"country": "country", "state": "state", "tag": "tag"}
+FACETS_CACHE_KEY = "radio_facets_snapshot"
+
+
+def selected_filters(params):
+    """Filtres choisis dans une QueryDict (GET) : {"country": [...], "state": [...], "tag": [...]}."""
+    filters = {name: [v for v in params.getlist(param) if v] for name, param in FILTER_PARAMS.items()}
+    filters["tag"] = [t for value in filters["tag"] for t in parse_tags(value)]
+    return filters
+
+
+def filter_radios(filters, radios=None, exclude=None):
+    """Applique les filtres (sauf la dimension `exclude`) à un queryset de Radio."""
+    radios = Radio.objects.all() if radios is None else radios
+    if filters.get("country") and exclude != "country":
+        radios = radios.filter(country__in=filters["country"])
+    if filters.get("state") and exclude != "state":
+        radios = radios.filter(state__in=filters["state"])
+    if filters.get("tag") and exclude != "tag":
+        radios = radios.filter(
+            pk__in=RadioTag.objects.filter(tag__name__in=filters["tag"]).values("radio_id")
+        )
+    return radios
+
+
+def _column_facet(filters, field, limit):
+    rows = (
+        filter_radios(filters, exclude=field)
+        .exclude(**{f"{field}__isnull": True})
+        .exclude(**{field: ""})
+        .values_list(field)
+        .annotate(count=Count("id"))
+        .order_by("-count", field)[:limit]
+    )
+    return [{"value": value, "count": count} for value, count in rows]
+
+
+def radio_facets(filters, limit=FACET_LIMIT):
+    """Comptes par pays, région et tag pour les filtres courants (trois requêtes d'agrégat)."""
+    others = filter_radios(filters, exclude="tag")
+    links = RadioTag.objects.all()
+    if others.query.where:
+        links = links.filter(radio_id__in=others.values("pk"))
+    tags = links.values_list("tag__name").annotate(count=Count("id")).order_by("-count", "tag__name")[:limit]
+    return {
+        "countries": _column_facet(filters, "country", limit),
+        "states": _column_facet(filters, "state", limit),
+        "tags": [{"value": name, "count": count} for name, count in tags],
+    }
+
+
+def facets_cache():
+    return caches["facets" if "facets" in settings.CACHES else "default"]
+
+
+def refresh_facet_cache():
+    """Recalcule l'instantané des options (pays, régions, tags et comptes) ; à appeler après une synchro."""
+    facets = radio_facets({}, limit=None)
+    snapshot = {
+        name: sorted(values, key=lambda f: str(f["value"]).casefold())
+        for name, values in facets.items()
+    }
+    snapshot["radios_count"] = Radio.objects.count()
+    snapshot["built_at"] = timezone.now().isoformat()
+    facets_cache().set(FACETS_CACHE_KEY, snapshot, None)
+    return snapshot
+
+
+def facet_snapshot():
+    """Instantané en cache (une lecture), calculé au premier appel s'il manque."""
+    return facets_cache().get(FACETS_CACHE_KEY) or refresh_facet_cache()
@@ -1,7 +1,6 @@
 import requests
-import re
-from bs4 import BeautifulSoup
 from radioscraper.models import Radio
+from radioscraper.scraping import scrape_homepage
 
 API_BASE = "https://de1.api.radio-browser.info/json/stations"
 
@@ -19,17 +18,8 @@ def fetch_radios(country=None, state=None, tag=None):
     return response.json()
 
 def extract_emails(url):
-    emails = set()
-    try:
-        resp = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
-        if resp.status_code == 200:
-            soup = BeautifulSoup(resp.text, "html.parser")
-            text = soup.get_text()
-            found = re.findall(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", text)
-            emails.update(found)
-    except Exception as e:
-        print(f"Erreur email pour {url}: {e}")
-    return ", ".join(emails)
+    """Emails de la page (et de sa page contact), via le moteur de scraping et son cache disque."""
+    return ", ".join(sorted(scrape_homepage(url)))
 
 def update_database(radios, force=False):
     """
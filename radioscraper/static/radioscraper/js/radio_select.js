@@ -65,11 +65,14 @@ $(document).ready(function() {
                     $currentCountry.text('Actualisation en cours : ' + data.current_country);
                 }
 
-                if (data.messages && data.messages.length > 0) {
-                    data.messages.forEach(msg => {
-                        $messages.append('<div class="alert alert-info mt-1">' + msg + '</div>');
-                    });
-                }
+                // Le serveur renvoie les derniers messages : on remplace l'affichage
+                $messages.empty();
+                (data.messages || []).forEach(msg => {
+                    $messages.append($('<div class="alert alert-info mt-1">').text(msg));
+                });
+                (data.errors || []).forEach(err => {
+                    $messages.append($('<div class="alert alert-danger mt-1">').text(err));
+                });
 
                 if (data.total) {
                     const percent = Math.min(100, Math.round((data.processed / data.total) * 100));
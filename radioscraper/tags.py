@@ -0,0 +1,75 @@
+"""
+Index normalisé des tags des radios (Tag + RadioTag).
+
+Radio.tags reste la chaîne brute de Radio Browser ("rock,pop, Jazz") ;
+ses tags normalisés sont recopiés dans RadioTag à chaque écriture d'une
+station par le chemin bulk (utils.sync_stations), ce qui permet des
+filtres par jointure indexée et des comptes par tag.
+"""
+from django.db import connection
+
+from .models import Radio, RadioTag, Tag
+
+TAG_MAX_LENGTH = 100
+CHUNK_SIZE = 500
+
+
+def _insert_link_sql():
+    qn = connection.ops.quote_name
+    return f"INSERT INTO {qn(RadioTag._meta.db_table)} ({qn('radio_id')}, {qn('tag_id')}) VALUES (%s, %s)"
+
+
+def parse_tags(value):
+    """Tags normalisés d'une chaîne "a,b, C" (ordre conservé, sans doublon)."""
+    tags = (t.strip().lower()[:TAG_MAX_LENGTH] for t in (value or "").split(","))
+    return list(dict.fromkeys(t for t in tags if t))
+
+
+def tag_ids(names):
+    """{nom: id}, en créant les tags manquants."""
+    names = list(set(names))
+    ids = {}
+    for start in range(0, len(names), CHUNK_SIZE):
+        chunk = names[start:start + CHUNK_SIZE]
+        ids.update(Tag.objects.filter(name__in=chunk).values_list("name", "id"))
+        missing = [n for n in chunk if n not in ids]
+        if missing:
+            Tag.objects.bulk_create([Tag(name=n) for n in missing], ignore_conflicts=True)
+            ids.update(Tag.objects.filter(name__in=missing).values_list("name", "id"))
+    return ids
+
+
+def sync_radio_tags(tags_by_uuid):
+    """
+    Remplace les liens RadioTag des radios données ({stationuuid: chaîne de tags}).
+    À exécuter par le writer unique, après l'écriture des radios.
+    """
+    uuids = list(tags_by_uuid)
+    parsed = {uuid: parse_tags(value) for uuid, value in tags_by_uuid.items()}
+    ids = tag_ids(t for tags in parsed.values() for t in tags)
+    for start in range(0, len(uuids), CHUNK_SIZE):
+        chunk = uuids[start:start + CHUNK_SIZE]
+        pk_by_uuid = dict(Radio.objects.filter(stationuuid__in=chunk).values_list("stationuuid", "pk"))
+        RadioTag.objects.filter(radio_id__in=pk_by_uuid.values()).delete()
+        rows = [(pk_by_uuid[uuid], ids[t]) for uuid in chunk if uuid in pk_by_uuid for t in parsed[uuid]]
+        if rows:
+            # executemany brut : pas d'instance de modèle pour des centaines de milliers de liens
+            with connection.cursor() as cursor:
+                cursor.executemany(_insert_link_sql(), rows)
+
+
+def prune_tags():
+    """Supprime les tags qui ne sont plus portés par aucune radio."""
+    return Tag.objects.filter(radio_tags__isnull=True).delete()[0]
+
+
+def rebuild_tag_index(batch_size=5000):
+    """Reconstruit tout l'index (radios écrites avant son introduction)."""
+    last_pk, total = 0, 0
+    while True:
+        rows = list(Radio.objects.filter(pk__gt=last_pk).order_by("pk").values_list("pk", "stationuuid", "tags")[:batch_size])
+        if not rows:
+            break
+        sync_radio_tags({uuid: tags for _, uuid, tags in rows})
+        last_pk, total = rows[-1][0], total + len(rows)
+    return total, prune_tags()
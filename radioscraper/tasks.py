@@ -1,78 +1,42 @@
-import math
-from celery import shared_task
-from django.core.cache import cache
-from tqdm import tqdm  # barre de progression console
-from .utils import fetch_stations_by_country, save_stations_batch
+from celery import chord, group, shared_task
 
-@shared_task(bind=True)
-def refresh_radios_task(self, countries=None, batch_size=100):
+from .pipeline import finish_refresh, plan_scrape, scrape_part, sync_country_part
+
+
+@shared_task
+def refresh_radios_task(task_id, countries, force=False):
     """
-    Tâche Celery pour actualiser les radios.
-    - countries : liste de pays à traiter
-    - batch_size : nombre de radios par batch
+    Tâche Celery d'actualisation des radios (lancée par pipeline.start_refresh).
+    - une sous-tâche par pays (group), puis
+    - une sous-tâche de scraping par tranche de radios (chord)
+    La progression est agrégée dans le cache (pipeline.refresh_progress).
     """
+    chord(
+        group(sync_country_task.s(task_id, i, country, force) for i, country in enumerate(countries))
+    )(scrape_stage_task.s(task_id))
 
-    if countries is None or len(countries) == 0:
-        countries = ["France"]
-
-    overall_created = 0
-    overall_updated = 0
-    overall_messages = []
 
-    for country in countries:
-        stations = fetch_stations_by_country(country)
-        total = len(stations)
-        total_batches = max(1, math.ceil(total / batch_size))
+@shared_task
+def sync_country_task(task_id, index, country, force=False):
+    return sync_country_part(task_id, index, country, force)
 
-        # Initialiser le cache pour le suivi frontend
-        cache.set(f"refresh_progress_{self.request.id}", {
-            "processed": 0,
-            "total": total,
-            "created": overall_created,
-            "updated": overall_updated,
-            "messages": [],
-            "current_country": country,
-            "finished": False
-        }, timeout=3600)
 
-        # Traitement par batch avec barre console
-        for batch_index in tqdm(range(total_batches), desc=f"Pays : {country}", unit="batch"):
-            batch = stations[batch_index * batch_size:(batch_index + 1) * batch_size]
-            created, updated, messages_list = save_stations_batch(
-                batch, batch_size=batch_size, task_id=self.request.id
-            )
+@shared_task
+def scrape_stage_task(candidate_lists, task_id):
+    chunks = plan_scrape(task_id, candidate_lists)
+    if not chunks:
+        finish_refresh(task_id)
+        return
+    chord(
+        group(scrape_chunk_task.s(task_id, i, pks) for i, pks in enumerate(chunks))
+    )(finish_refresh_task.si(task_id))
 
-            overall_created += created
-            overall_updated += updated
-            overall_messages.extend(messages_list)
 
-            # Mettre à jour la progression dans le cache pour le front
-            processed = min((batch_index + 1) * batch_size, total)
-            cache.set(f"refresh_progress_{self.request.id}", {
-                "processed": processed,
-                "total": total,
-                "created": overall_created,
-                "updated": overall_updated,
-                "messages": overall_messages[-5:],
-                "current_country": country,
-                "finished": False
-            }, timeout=3600)
+@shared_task
+def scrape_chunk_task(task_id, index, pks):
+    scrape_part(task_id, index, pks)
 
-    # Marquer la tâche comme terminée
-    cache.set(f"refresh_progress_{self.request.id}", {
-        "processed": overall_created + overall_updated,
-        "total": overall_created + overall_updated,
-        "created": overall_created,
-        "updated": overall_updated,
-        "messages": overall_messages[-5:],
-        "current_country": None,
-        "finished": True
-    }, timeout=3600)
 
-    return {
-        "status": "done",
-        "total": overall_created + overall_updated,
-        "created": overall_created,
-        "updated": overall_updated,
-        "messages": overall_messages
-    }
+@shared_task
+def finish_refresh_task(task_id):
+    finish_refresh(task_id)
@@ -0,0 +1,166 @@
+"""
+Synchro Radio Browser contre un serveur HTTP local (StandInRadioBrowser)
+qui sert les stations de test_fixtures/radiobrowser_stations.json avec les
+mêmes paramètres que l'API (/json/stations/search : order, reverse,
+country, countryExact, offset, limit).
+"""
+import copy
+import datetime
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .models import Radio, SyncCheckpoint
+from .radiobrowser import station_changed_at
+from .utils import CHECKPOINT_MARGIN, sync_country, sync_stations
+
+FIXTURE = Path(__file__).parent / "test_fixtures" / "radiobrowser_stations.json"
+
+
+class StandInRadioBrowser:
+    """Serveur Radio Browser minimal, dans un thread ; on_request(requête) est appelé après chaque page servie."""
+
+    def __init__(self, stations):
+        self.stations = copy.deepcopy(stations)
+        self.requests = []
+        self.on_request = None
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if url.path != "/json/stations/search":
+                    self.send_error(404)
+                    return
+                body = json.dumps(server.search(params)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                server.requests.append(params)
+                if server.on_request:
+                    server.on_request(params)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def search(self, params):
+        rows = [s for s in self.stations if not params.get("country") or s["country"] == params["country"]]
+        order = params.get("order", "name")
+        rows.sort(key=lambda s: s[order], reverse=params.get("reverse") == "true")
+        offset, limit = int(params.get("offset", 0)), int(params.get("limit", 100000))
+        return rows[offset:offset + limit]
+
+    def touch(self, uuid, **changes):
+        """Modifie une station, qui devient la plus récemment changée."""
+        now = timezone.now().astimezone(datetime.timezone.utc)
+        station = next(s for s in self.stations if s["stationuuid"] == uuid)
+        station.update(changes)
+        station["lastchangetime"] = now.strftime("%Y-%m-%d %H:%M:%S")
+        station["lastchangetime_iso8601"] = now.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class SyncCountryTests(TransactionTestCase):
+    # TransactionTestCase : les écritures passent par le thread de write_queue (autre connexion)
+
+    def setUp(self):
+        self.fixture = json.loads(FIXTURE.read_text(encoding="utf-8"))
+        self.server = StandInRadioBrowser(self.fixture)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        settings_override = override_settings(RADIO_BROWSER_URL=self.server.url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def sync(self, delta=True, country=None):
+        return sync_country(country, delta=delta, page_size=5, workers=2)
+
+    def test_full_pass_reads_every_station_by_uuid(self):
+        stats = self.sync(delta=False)
+        self.assertEqual(stats["fetched"], len(self.fixture))
+        self.assertEqual(Radio.objects.count(), len(self.fixture))
+        self.assertTrue(all(r["order"] == "stationuuid" for r in self.server.requests))
+        newest = max(station_changed_at(s) for s in self.fixture)
+        self.assertEqual(SyncCheckpoint.objects.get(country="").last_change, newest)
+
+    def test_country_filter(self):
+        self.sync(delta=False, country="Belgium")
+        expected = {s["stationuuid"] for s in self.fixture if s["country"] == "Belgium"}
+        self.assertEqual(set(Radio.objects.values_list("stationuuid", flat=True)), expected)
+        self.assertTrue(SyncCheckpoint.objects.filter(country="Belgium").exists())
+
+    def test_delta_reads_only_changed_stations(self):
+        self.sync(delta=False)
+        uuid = self.fixture[3]["stationuuid"]
+        self.server.touch(uuid, name="Radio Renommée")
+        self.server.requests.clear()
+
+        stats = self.sync()
+        self.assertEqual(stats["fetched"], 2)  # station modifiée + celle du point de reprise (borne incluse)
+        self.assertEqual(stats["updated"], 1)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.server.requests[0]["order"], "lastchangetime")
+        self.assertEqual(Radio.objects.get(stationuuid=uuid).name, "Radio Renommée")
+
+    def test_station_changed_during_full_pass_is_neither_skipped_nor_lost(self):
+        # Une station déjà lue change après la première page : en tri lastchangetime,
+        # elle passerait en tête et décalerait les pages suivantes.
+        first = sorted(s["stationuuid"] for s in self.fixture)[0]
+
+        def change_once(params):
+            if params["offset"] == "0":
+                self.server.touch(first, name="Changée en cours de passe")
+
+        self.server.on_request = change_once
+        stats = self.sync(delta=False)
+        self.assertEqual(stats["fetched"], len(self.fixture))
+        self.assertEqual(Radio.objects.count(), len(self.fixture))
+
+        # Le point de reprise reste avant le changement : la synchro delta suivante le lit
+        checkpoint = SyncCheckpoint.objects.get(country="").last_change
+        self.assertLessEqual(checkpoint, timezone.now() - CHECKPOINT_MARGIN)
+        self.server.on_request = None
+        self.sync()
+        self.assertEqual(Radio.objects.get(stationuuid=first).name, "Changée en cours de passe")
+
+
+class SyncStationsEmailTests(TestCase):
+
+    def setUp(self):
+        self.station = json.loads(FIXTURE.read_text(encoding="utf-8"))[0]
+
+    def test_scraped_emails_do_not_change_the_content_hash(self):
+        sync_stations([self.station], scraped={self.station["stationuuid"]: "contact@radio.example"})
+        radio = Radio.objects.get(stationuuid=self.station["stationuuid"])
+        self.assertIn("contact@radio.example", radio.emails)
+
+        # Même station relue depuis l'API : ni réécrite, ni privée de l'email scrapé
+        created, updated, unchanged = sync_stations([self.station])
+        self.assertEqual((len(created), len(updated), len(unchanged)), (0, 0, 1))
+        self.assertIn("contact@radio.example", Radio.objects.get(pk=radio.pk).emails)
+
+    def test_new_scraped_email_updates_an_unchanged_station(self):
+        sync_stations([self.station])
+        created, updated, unchanged = sync_stations(
+            [self.station], scraped={self.station["stationuuid"]: "nouveau@radio.example"}
+        )
+        self.assertEqual(len(updated), 1)
+        self.assertIn("nouveau@radio.example", Radio.objects.get(stationuuid=self.station["stationuuid"]).emails)
@@ -3,8 +3,12 @@ from . import views
 
 urlpatterns = [
     path("", views.radio_search, name="radio_search"),
+    path("facets/", views.radio_facets_api, name="radio_facets"),
+    path("search/", views.radio_text_search_api, name="radio_text_search"),
     path("refresh/", views.radio_refresh, name="radio_refresh"),
     path('refresh/start/', views.radio_refresh_start, name='radio_refresh_start'),
+    path("refresh/progress/", views.radio_refresh_progress, name="radio_refresh_progress"),
     path("export/xlsx/", views.export_xlsx, name="export_xlsx"),
     path("export/pdf/", views.export_pdf, name="export_pdf"),
+    path("export/stream/<str:fmt>/", views.export_stream, name="export_stream"),
 ]
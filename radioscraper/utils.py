@@ -1,70 +1,142 @@
-import requests
-import time
-from django.db import transaction, OperationalError
-from radioscraper.models import Radio
+import datetime
+import hashlib
+import json
+
+from django.utils import timezone
+from playlistwatcher.db import write_queue
+from radioscraper.models import Radio, SyncCheckpoint
+from radioscraper.radiobrowser import FETCH_WORKERS, PAGE_SIZE, iter_station_pages, station_changed_at
+from radioscraper.tags import sync_radio_tags
 
-API_URL = "https://de1.api.radio-browser.info/json/stations"
 BATCH_SIZE = 50
+BULK_BATCH_SIZE = 500
+PREFETCH_CHUNK_SIZE = 500  # reste sous la limite de variables SQLite
+CHECKPOINT_MARGIN = datetime.timedelta(minutes=10)  # écart d'horloge toléré avec l'API
+
+
+def fetch_stations_by_country(country=None, limit=PAGE_SIZE):
+    """
+    Récupère toutes les radios d'un pays (liste complète).
+    Pour les gros volumes, préférer iter_station_pages / sync_country.
+    """
+    return [s for page in iter_station_pages(country=country, page_size=limit) for s in page]
 
 
-def fetch_stations_by_country(country=None, limit=1000, offset=0):
+def station_defaults(s):
     """
-    Récupère les radios depuis Radio Browser pour un pays précis.
-    Paginer si nécessaire.
+    Champs Radio à partir d'une station Radio Browser.
     """
-    params = {"limit": limit, "offset": offset}
-    if country:
-        params["country"] = country
+    return {
+        "name": s.get("name", "")[:255],
+        "country": s.get("country", ""),
+        "state": s.get("state", ""),
+        "tags": s.get("tags", ""),
+        "homepage": s.get("homepage", ""),
+        "emails": s.get("email", ""),
+        "favicon": s.get("favicon", ""),
+        "language": s.get("language", ""),
+        "stream_url": s.get("url", ""),
+    }
+
 
-    all_stations = []
-    while True:
-        response = requests.get(API_URL, params=params, timeout=30)
-        response.raise_for_status()
-        stations = response.json()
-        if not stations:
-            break
-        all_stations.extend(stations)
-        offset += limit
-        params["offset"] = offset
-    return all_stations
+SYNC_FIELDS = list(station_defaults({}))
 
 
-def safe_update_or_create(defaults, stationuuid, max_retries=5):
+def content_hash(defaults):
     """
-    Update or create avec gestion des verrous SQLite et UNIQUE constraint.
+    Empreinte des champs synchronisés : une station inchangée n'est pas réécrite.
     """
-    for attempt in range(max_retries):
-        try:
-            return Radio.objects.update_or_create(
-                stationuuid=stationuuid,
-                defaults=defaults
-            )
-        except OperationalError as e:
-            if 'database is locked' in str(e):
-                time.sleep(0.5)
-            else:
-                raise
-        except Exception as e:
-            if "UNIQUE constraint failed" in str(e):
-                # Chercher l'objet par (name, country, state)
-                obj = Radio.objects.filter(
-                    name=defaults["name"],
-                    country=defaults["country"],
-                    state=defaults["state"]
-                ).first()
-                if obj:
-                    for k, v in defaults.items():
-                        setattr(obj, k, v)
-                    obj.save()
-                    return obj, False
-            else:
-                raise
-    raise OperationalError(f"Impossible d'écrire la station {stationuuid} après {max_retries} tentatives.")
+    payload = json.dumps([defaults[f] or "" for f in SYNC_FIELDS], ensure_ascii=False)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def merge_emails(*values):
+    """Union d'adresses ("a@x.fr, b@y.fr"), triée et sans doublon."""
+    emails = {e.strip() for value in values if value for e in value.split(",")}
+    return ", ".join(sorted(filter(None, emails)))
+
+
+def existing_stations(uuids):
+    """
+    {stationuuid: (id, emails, content_hash)} des radios déjà en base, en une requête par tranche.
+    """
+    uuids = list(uuids)
+    existing = {}
+    for start in range(0, len(uuids), PREFETCH_CHUNK_SIZE):
+        rows = Radio.objects.filter(stationuuid__in=uuids[start:start + PREFETCH_CHUNK_SIZE]).values_list(
+            "stationuuid", "id", "emails", "content_hash"
+        )
+        existing.update((uuid, (pk, emails, digest)) for uuid, pk, emails, digest in rows)
+    return existing
+
+
+def sync_stations(stations, existing=None, scraped=None):
+    """
+    Upsert en bulk d'un lot de stations (à exécuter par le writer unique).
+    - existing : carte de existing_stations(), relue si absente
+    - scraped : {stationuuid: emails scrapés} à ajouter aux emails
+    - l'empreinte ne porte que sur les champs de l'API : les stations dont
+      l'empreinte n'a pas changé et sans nouvel email sont ignorées
+    - les emails déjà en base (scrapés) sont conservés et complétés
+    - insertions et mises à jour en un seul INSERT ... ON CONFLICT(stationuuid)
+    - index des tags (RadioTag) mis à jour pour les radios écrites
+    Retourne (créées, mises à jour, inchangées) sous forme de listes de Radio.
+    """
+    by_uuid = {s["stationuuid"]: s for s in stations if s.get("stationuuid")}  # dernier doublon gagnant
+    if existing is None:
+        existing = existing_stations(by_uuid)
+
+    now = timezone.now()
+    created, updated, unchanged = [], [], []
+    for uuid, s in by_uuid.items():
+        defaults = station_defaults(s)
+        digest = content_hash(defaults)
+        known = existing.get(uuid)
+        defaults["emails"] = merge_emails(known[1] if known else "", defaults["emails"], (scraped or {}).get(uuid))
+        radio = Radio(stationuuid=uuid, content_hash=digest, updated_at=now, **defaults)
+        if known is None:
+            created.append(radio)
+        elif known[2] != digest or known[1] != defaults["emails"]:
+            radio.pk = known[0]
+            updated.append(radio)
+        else:
+            unchanged.append(radio)
+
+    changed = created + updated
+    for start in range(0, len(changed), BULK_BATCH_SIZE):
+        Radio.objects.bulk_create(
+            changed[start:start + BULK_BATCH_SIZE],
+            update_conflicts=True,
+            unique_fields=["stationuuid"],
+            update_fields=SYNC_FIELDS + ["content_hash", "updated_at"],
+        )
+    sync_radio_tags({r.stationuuid: r.tags for r in changed})
+    # La carte reste valable pour les lots suivants d'une même fenêtre
+    existing.update((r.stationuuid, (r.pk, r.emails, r.content_hash)) for r in changed)
+    return created, updated, unchanged
+
+
+def _write_stations(batch, start, total, existing=None, scraped=None):
+    """
+    Écrit un lot de stations (exécuté par le writer unique).
+    """
+    created, updated, unchanged = sync_stations(batch, existing, scraped)
+    messages = [f"Créée : {radio.name}" for radio in created]
+    messages += [f"Mise à jour : {radio.name}" for radio in updated]
+
+    # Barre de progression console
+    end = start + len(batch) - 1
+    progress = (end / total) * 100 if total else 100
+    print(
+        f"\r[{end}/{total}] +{len(created)} ~{len(updated)} ={len(unchanged)} - {progress:5.1f}% ",
+        end="", flush=True,
+    )
+    return len(created), len(updated), messages
 
 
 def save_stations_batch(stations, batch_size=BATCH_SIZE):
     """
-    Sauvegarde les stations par lots pour éviter les verrous SQLite.
+    Sauvegarde les stations par lots via la file d'écriture unique.
     Affiche une barre de progression console et retourne messages.
     """
     total_created, total_updated = 0, 0
@@ -73,31 +145,10 @@ def save_stations_batch(stations, batch_size=BATCH_SIZE):
 
     for offset in range(0, total, batch_size):
         batch = stations[offset:offset+batch_size]
-        with transaction.atomic():
-            for i, s in enumerate(batch, start=offset+1):
-                defaults = {
-                    "name": s.get("name", ""),
-                    "country": s.get("country", ""),
-                    "state": s.get("state", ""),
-                    "tags": s.get("tags", ""),
-                    "homepage": s.get("homepage", ""),
-                    "emails": s.get("email", ""),
-                    "favicon": s.get("favicon", ""),
-                    "language": s.get("language", ""),
-                    "stream_url": s.get("url", ""),
-                }
-                radio, created = safe_update_or_create(defaults=defaults, stationuuid=s["stationuuid"])
-                action = "Créée" if created else "Mise à jour"
-                messages.append(f"[{i}/{total}] {action} : {radio.name}")
-
-                if created:
-                    total_created += 1
-                else:
-                    total_updated += 1
-
-                # Barre de progression console
-                progress = (i / total) * 100
-                print(f"\r[{i}/{total}] {radio.name[:30]:30} - {progress:5.1f}% ", end="", flush=True)
+        created, updated, batch_messages = write_queue.run(_write_stations, batch, offset + 1, total)
+        total_created += created
+        total_updated += updated
+        messages.extend(batch_messages)
         print()  # nouvelle ligne après batch
 
     print(f"Total créées: {total_created}, mises à jour: {total_updated}")
@@ -109,31 +160,7 @@ def refresh_radios_progress(country=None):
     Récupère les radios et met à jour la base locale avec messages de progression.
     """
     stations = fetch_stations_by_country(country=country)
-    total_created, total_updated = 0, 0
-    messages = []
-
-    for batch_start in range(0, len(stations), BATCH_SIZE):
-        batch = stations[batch_start:batch_start+BATCH_SIZE]
-        with transaction.atomic():
-            for i, s in enumerate(batch, start=batch_start+1):
-                defaults = {
-                    "name": s.get("name", ""),
-                    "country": s.get("country", ""),
-                    "state": s.get("state", ""),
-                    "tags": s.get("tags", ""),
-                    "homepage": s.get("homepage", ""),
-                    "emails": s.get("email", ""),
-                    "favicon": s.get("favicon", ""),
-                    "language": s.get("language", ""),
-                    "stream_url": s.get("url", ""),
-                }
-                radio, was_created = safe_update_or_create(defaults=defaults, stationuuid=s["stationuuid"])
-                action = "Créée" if was_created else "Mise à jour"
-                messages.append(f"[{i}/{len(stations)}] {action} : {radio.name}")
-                if was_created:
-                    total_created += 1
-                else:
-                    total_updated += 1
+    total_created, total_updated, messages = save_stations_batch(stations)
 
     return {
         "total": len(stations),
@@ -141,3 +168,42 @@ def refresh_radios_progress(country=None):
         "updated": total_updated,
         "messages": messages
     }
+
+
+def sync_country(country=None, delta=True, batch_size=BULK_BATCH_SIZE, workers=FETCH_WORKERS, on_page=None,
+                 page_size=PAGE_SIZE):
+    """
+    Synchro streaming d'un pays, page par page.
+    En delta, seules les stations modifiées depuis le point de reprise du pays
+    sont lues ; le point de reprise n'avance qu'après une passe complète.
+    Il ne dépasse jamais le début de la passe (moins CHECKPOINT_MARGIN) : une
+    station modifiée pendant la passe, déjà lue ou pas encore, est relue par
+    la synchro delta suivante.
+    on_page(stats, messages) est appelé après l'écriture de chaque page.
+    """
+    key = country or ""
+    checkpoint = SyncCheckpoint.objects.filter(country=key).first()
+    since = checkpoint.last_change if delta and checkpoint else None
+    started = timezone.now()
+
+    stats = {"fetched": 0, "created": 0, "updated": 0, "since": since}
+    newest = None
+    for page in iter_station_pages(country=country, since=since, page_size=page_size, workers=workers):
+        newest = max(filter(None, [newest, *map(station_changed_at, page)]), default=None)
+        page_messages = []
+        for offset in range(0, len(page), batch_size):
+            created, updated, messages = write_queue.run(
+                _write_stations, page[offset:offset + batch_size], stats["fetched"] + offset + 1, stats["fetched"] + len(page)
+            )
+            stats["created"] += created
+            stats["updated"] += updated
+            page_messages += messages
+        stats["fetched"] += len(page)
+        if on_page:
+            on_page(stats, page_messages)
+    print()
+
+    if newest is not None:
+        last_change = min(newest, started - CHECKPOINT_MARGIN)
+        write_queue.run(lambda: SyncCheckpoint.objects.update_or_create(country=key, defaults={"last_change": last_change}))
+    return stats
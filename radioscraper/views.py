@@ -1,100 +1,73 @@
-import re, requests, time
 from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import render
 from django.http import HttpResponse, JsonResponse
-from django.db import transaction, OperationalError
 from django.core.paginator import Paginator
 from django.core.cache import cache
 import pandas as pd
-from tqdm import tqdm
 from io import BytesIO
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
 from reportlab.platypus import SimpleDocTemplate, Table
+from playlistwatcher.streaming import stream_export
+from playlistwatcher.db import write_queue
 from .models import Radio
-from .utils import fetch_stations_by_country, BATCH_SIZE
+from .fts import search_radios
+from .pipeline import refresh_progress, start_refresh
+from .radiobrowser import country_station_count, fetch_page
+from .scraping import SCRAPE_WINDOW, scrape_homepage, scrape_many
+from .search import FACET_LIMIT, facet_snapshot, filter_radios, radio_facets, refresh_facet_cache, selected_filters
+from .utils import existing_stations, merge_emails, _write_stations, BATCH_SIZE
 
 
-def safe_update_or_create(defaults, stationuuid, max_retries=5):
-    """
-    Retry pour éviter les erreurs SQLite 'database is locked'.
-    """
-    for attempt in range(max_retries):
-        try:
-            return Radio.objects.update_or_create(
-                stationuuid=stationuuid,
-                defaults=defaults
-            )
-        except OperationalError as e:
-            if 'database is locked' in str(e):
-                time.sleep(0.5)
-            else:
-                raise
-    raise OperationalError(f"Impossible d'écrire la station {stationuuid} après {max_retries} tentatives.")
+TEXT_SEARCH_MAX_RESULTS = 100
 
 
 def save_stations_batch(stations, batch_size=BATCH_SIZE, task_id=None, force=False):
     """
     Ajoute la récupération d'email depuis la homepage/contact si disponible.
-    Sauvegarde les stations par lots pour éviter les verrous SQLite.
+    Les emails sont scrapés en parallèle (radioscraper/scraping.py) par fenêtres
+    de SCRAPE_WINDOW stations, hors transaction ; chaque lot est ensuite écrit
+    d'un bloc par le writer unique.
+    Les radios ayant déjà des emails ne sont re-scrapées qu'avec force=True.
+    La carte des radios existantes, lue une fois par fenêtre, sert aussi à
+    l'upsert bulk (stations inchangées ignorées).
     Met à jour la progression en cache si task_id fourni.
     """
     total_created, total_updated = 0, 0
     messages_list = []
     total = len(stations)
 
-    for offset in range(0, len(stations), batch_size):
-        batch = stations[offset:offset + batch_size]
-        total_batches = (len(stations) + batch_size - 1) // batch_size
-
-        for s in tqdm(batch, desc=f"Batch {offset // batch_size + 1}/{total_batches}", unit="station"):
-            with transaction.atomic():
-                homepage = s.get("homepage", "")
-                api_email = s.get("email", "")
-
-                try:
-                    existing_radio = Radio.objects.get(stationuuid=s["stationuuid"])
-                    if existing_radio.emails and not force:
-                        scraped_email = ""  # on garde l'existant
-                    else:
-                        scraped_email = extract_email_from_homepage(homepage)
-                except Radio.DoesNotExist:
-                    scraped_email = extract_email_from_homepage(homepage)
-
-                combined_email = ", ".join(filter(None, {api_email, scraped_email}))
-
-                defaults = {
-                    "name": s.get("name", "")[:255],
-                    "country": s.get("country", ""),
-                    "state": s.get("state", ""),
-                    "tags": s.get("tags", ""),
-                    "homepage": homepage,
-                    "emails": combined_email,
-                    "favicon": s.get("favicon", ""),
-                    "language": s.get("language", ""),
-                    "stream_url": s.get("url", ""),
-                }
-                radio, created = safe_update_or_create(defaults=defaults, stationuuid=s["stationuuid"])
-                action = "Créée" if created else "Mise à jour"
-                messages_list.append(f"{action} : {radio.name} ({radio.country})")
-
-                if created:
-                    total_created += 1
-                else:
-                    total_updated += 1
-
-        if task_id:
-            cache.set(
-                f"refresh_progress_{task_id}",
-                {
-                    "processed": offset + len(batch),
-                    "total": total,
-                    "created": total_created,
-                    "updated": total_updated,
-                    "messages": messages_list[-5:],
-                },
-                timeout=3600
+    for window_start in range(0, total, SCRAPE_WINDOW):
+        window = stations[window_start:window_start + SCRAPE_WINDOW]
+        existing = existing_stations(s["stationuuid"] for s in window)
+        to_scrape = {s["stationuuid"] for s in window if force or not existing.get(s["stationuuid"], (None, None))[1]}
+        scraped = scrape_many(s.get("homepage", "") for s in window if s["stationuuid"] in to_scrape)
+
+        for offset in range(window_start, window_start + len(window), batch_size):
+            prepared = stations[offset:min(offset + batch_size, window_start + len(window))]
+            # Emails scrapés passés à part : l'empreinte de la station ne porte que sur les champs de l'API
+            found = {
+                s["stationuuid"]: merge_emails(*scraped.get(s.get("homepage", ""), ()))
+                for s in prepared if s["stationuuid"] in to_scrape
+            }
+
+            created, updated, batch_messages = write_queue.run(
+                _write_stations, prepared, offset + 1, total, existing, found
             )
+            total_created += created
+            total_updated += updated
+            messages_list.extend(batch_messages)
+
+            if task_id:
+                cache.set(
+                    f"refresh_progress_{task_id}",
+                    {
+                        "processed": offset + len(prepared),
+                        "total": total,
+                        "created": total_created,
+                        "updated": total_updated,
+                        "messages": messages_list[-5:],
+                    },
+                    timeout=3600
+                )
 
     return total_created, total_updated, messages_list
 
@@ -103,51 +76,71 @@ def radio_search(request):
     """
     Recherche des radios avec filtrage multi-sélection et pagination.
     """
-    radios = Radio.objects.all()
-    selected_countries = request.GET.getlist('country')
-    selected_states = request.GET.getlist('state')
-    selected_tags = request.GET.getlist('tag')
-
-    # Filtrage
-    if selected_countries:
-        radios = radios.filter(country__in=selected_countries)
-    if selected_states:
-        radios = radios.filter(state__in=selected_states)
-    if selected_tags:
-        query = None
-        for tag in selected_tags:
-            q = radios.filter(tags__icontains=tag)
-            query = q if query is None else query | q
-        radios = query.distinct()
+    filters = selected_filters(request.GET)
+    query = request.GET.get('q', '').strip()
+    radios, ranked = search_radios(query, filter_radios(filters))
+    if not ranked:
+        radios = radios.order_by('name')
 
     # Pagination
     page_number = request.GET.get('page', 1)
-    paginator = Paginator(radios.order_by('name'), 100)  # 100 radios par page
+    paginator = Paginator(radios, 100)  # 100 radios par page
     page_obj = paginator.get_page(page_number)
 
-    # Options multi-select
-    countries = Radio.objects.values_list('country', flat=True).distinct().order_by('country')
-    states = Radio.objects.values_list('state', flat=True).distinct().order_by('state')
-    all_tags = []
-    for t in Radio.objects.values_list('tags', flat=True):
-        if t:
-            all_tags.extend([tag.strip() for tag in t.split(',')])
-    tags = sorted(list(set(all_tags)))
+    # Options multi-select : instantané des facettes, reconstruit après chaque synchro
+    facets = facet_snapshot()
 
     return render(request, "radioscraper/radio_search.html", {
         "radios": page_obj.object_list,  # radios à afficher sur cette page
         "page_obj": page_obj,
-        "countries": list(countries),
-        "states": list(states),
-        "tags": tags,
-        "selected_countries": selected_countries,
-        "selected_states": selected_states,
-        "selected_tags": selected_tags,
-        "radios_count": Radio.objects.count(),
+        "countries": facets["countries"],
+        "states": facets["states"],
+        "tags": facets["tags"],
+        "selected_countries": filters["country"],
+        "selected_states": filters["state"],
+        "selected_tags": filters["tag"],
+        "query": query,
+        "radios_count": facets["radios_count"],
         "displayed_count": page_obj.end_index(),  # Nombre affiché sur la page courante
     })
 
 
+def radio_text_search_api(request):
+    """
+    Recherche plein texte (paramètre q, préfixes, tri par pertinence) combinable
+    avec les filtres pays / région / tag de la page de recherche.
+    """
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return JsonResponse({"error": "Paramètre q manquant"}, status=400)
+    try:
+        limit = max(1, min(int(request.GET.get("limit", 20)), TEXT_SEARCH_MAX_RESULTS))
+    except ValueError:
+        return JsonResponse({"error": "limit invalide"}, status=400)
+
+    radios, ranked = search_radios(query, filter_radios(selected_filters(request.GET)))
+    if not ranked:
+        radios = radios.order_by("name")
+    fields = ["id", "stationuuid", "name", "country", "state", "tags", "homepage", "emails"]
+    results = [
+        {**{f: getattr(r, f) for f in fields}, "rank": getattr(r, "fts_rank", None)}
+        for r in radios.only(*fields)[:limit]
+    ]
+    return JsonResponse({"query": query, "ranked": ranked, "results": results})
+
+
+def radio_facets_api(request):
+    """
+    Comptes par pays, région et tag pour les filtres courants (mêmes paramètres GET que la recherche).
+    """
+    try:
+        limit = max(1, min(int(request.GET.get("limit", FACET_LIMIT)), FACET_LIMIT))
+    except ValueError:
+        return JsonResponse({"error": "limit invalide"}, status=400)
+    filters = selected_filters(request.GET)
+    return JsonResponse({"filters": filters, **radio_facets(filters, limit=limit)})
+
+
 def radio_refresh(request):
     """
     Page principale d'actualisation : bouton + barre de progression (popup).
@@ -163,80 +156,31 @@ def radio_refresh(request):
 @csrf_exempt
 def radio_refresh_start(request):
     """
-    Lance l’actualisation et enregistre l’état dans le cache.
+    Lance l'actualisation en arrière-plan (Celery, ou threads sans broker)
+    et retourne aussitôt l'identifiant à suivre.
     """
-    selected_countries = request.POST.getlist("country") or [None]
-    force = request.POST.get("force") == "on"
-    task_id = str(int(time.time()))
-
-    # Init du cache
-    cache.set(
-        f"refresh_progress_{task_id}",
-        {"processed": 0, "total": 0, "created": 0, "updated": 0, "messages": []},
-        timeout=3600
+    selected_countries = (
+        request.POST.getlist("countries[]") or request.POST.getlist("countries") or request.POST.getlist("country")
     )
-
-    # Exécution synchrone (pour async il faudrait Celery/RQ)
-    for country in selected_countries:
-        stations = fetch_stations_by_country(country=country)
-        save_stations_batch(stations, batch_size=BATCH_SIZE, task_id=task_id, force=force)
-
+    force = request.POST.get("force") == "on"
+    task_id = start_refresh(selected_countries, force=force)
     return JsonResponse({"task_id": task_id})
 
 
-def radio_refresh_progress(request, task_id):
+def radio_refresh_progress(request):
     """
     Renvoie la progression pour affichage côté front (AJAX polling).
     """
-    data = cache.get(f"refresh_progress_{task_id}")
+    data = refresh_progress(request.GET.get("task_id", ""))
     if not data:
         return JsonResponse({"error": "Task not found"}, status=404)
     return JsonResponse(data)
 
 
 def extract_email_from_homepage(url):
-    if not url:
-        return None
-
-    headers = {"User-Agent": "Mozilla/5.0"}
-    emails_found = set()
-
-    def fetch_and_extract(target_url):
-        try:
-            resp = requests.get(target_url, headers=headers, timeout=10)
-            resp.raise_for_status()
-
-            # Extraire avec regex brute
-            emails = re.findall(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", resp.text)
-            emails_found.update(emails)
-
-            # Extraire les liens mailto
-            soup = BeautifulSoup(resp.text, "html.parser")
-            for a in soup.find_all("a", href=True):
-                if a["href"].startswith("mailto:"):
-                    emails_found.add(a["href"].replace("mailto:", "").strip())
-
-        except Exception as e:
-            print(f"⚠️ Impossible de récupérer {target_url}: {e}")
-
-    # 1) Scraper la page d’accueil
-    fetch_and_extract(url)
-
-    # 2) Chercher un lien "Contact" dans la page
-    try:
-        resp = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        for a in soup.find_all("a", href=True):
-            text = a.get_text(strip=True).lower()
-            if "contact" in text:
-                contact_url = urljoin(url, a["href"])
-                fetch_and_extract(contact_url)
-                break
-    except Exception:
-        pass
-
-    return ", ".join(emails_found) if emails_found else None
+    """Emails de la page d'accueil et de sa page contact, séparés par des virgules."""
+    emails = scrape_homepage(url)
+    return ", ".join(sorted(emails)) if emails else None
 
 
 @csrf_exempt
@@ -252,15 +196,19 @@ def radio_refresh_ajax(request):
     if country_index >= len(selected_countries):
         return JsonResponse({"finished": True})
 
+    # Seule la page demandée est lue ; le total vient du compteur de l'API (en cache)
     country = selected_countries[country_index]
-    stations = fetch_stations_by_country(country=country)
-    total = len(stations)
-    batch_stations = stations[offset:offset+BATCH_SIZE]
+    batch_stations = fetch_page(country=country, offset=offset, limit=BATCH_SIZE)
+    total = max(country_station_count(country), offset + len(batch_stations))
+    if len(batch_stations) < BATCH_SIZE:
+        total = offset + len(batch_stations)
 
     created, updated, messages_list = save_stations_batch(
         batch_stations, batch_size=BATCH_SIZE, force=force
     )
     remaining = total - (offset + len(batch_stations))
+    if remaining <= 0:
+        refresh_facet_cache()
 
     next_offset = offset + BATCH_SIZE if remaining > 0 else 0
     next_country_index = country_index if remaining > 0 else country_index + 1
@@ -289,6 +237,40 @@ def export_xlsx(request):
     return response
 
 
+RADIO_STREAM_COLUMNS = {
+    "id": "id",
+    "stationuuid": "stationuuid",
+    "name": "name",
+    "country": "country",
+    "state": "state",
+    "tags": "tags",
+    "homepage": "homepage",
+    "stream_url": "stream_url",
+    "emails": "emails",
+    "favicon": "favicon",
+    "language": "language",
+    "updated_at": "updated_at",
+}
+RADIO_STREAM_FILTERS = {
+    "country": "country",
+    "state": "state",
+    "language": "language",
+}
+
+
+def export_stream(request, fmt):
+    """
+    Export CSV / NDJSON des radios en streaming (pas de DataFrame en mémoire).
+    """
+    return stream_export(
+        request, Radio.objects.all(), fmt,
+        available=RADIO_STREAM_COLUMNS,
+        filters=RADIO_STREAM_FILTERS,
+        cursor_field="updated_at",
+        filename="radios",
+    )
+
+
 def export_pdf(request):
     radios = Radio.objects.all().values_list("name", "country", "state", "tags", "homepage", "emails")
     buffer = BytesIO()
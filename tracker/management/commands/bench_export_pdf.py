@@ -0,0 +1,55 @@
+import tempfile
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from tracker.utils.export_data import render_apparitions_pdf
+
+
+def synthetic_apparitions(n):
+    """Lignes factices au format APPARITIONS_FIELDS (sans accès base)."""
+    now = datetime(2025, 1, 1)
+    for i in range(n):
+        yield {
+            "track__name": f"Titre {i % 200}",
+            "playlist__name": f"Playlist de test numéro {i} avec un nom assez long",
+            "playlist__owner_name": f"Curateur {i % 5000}",
+            "contact": f"curateur{i % 5000}@example.com",
+            "playlist__followers": (i * 37) % 250000,
+            "added_on": now,
+            "state": "found",
+            "playlist__description": "",
+            "updated_on": now,
+            "playlist__url": "",
+            "playlist__owner_url": "",
+        }
+
+
+class Command(BaseCommand):
+    help = "Benchmark du rendu PDF des apparitions : le temps par ligne doit rester constant (rendu linéaire)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="5000,10000,25000,50000",
+            help="Nombres de lignes à rendre, séparés par des virgules.",
+        )
+
+    def handle(self, *args, **opts):
+        sizes = [int(s) for s in opts["sizes"].split(",") if s.strip()]
+        baseline = None
+
+        for n in sizes:
+            with tempfile.TemporaryFile() as f:
+                start = time.perf_counter()
+                pages = render_apparitions_pdf(synthetic_apparitions(n), f)
+                elapsed = time.perf_counter() - start
+                size_kb = f.tell() / 1024
+
+            per_row = elapsed / n * 1e6
+            baseline = baseline or per_row
+            self.stdout.write(
+                f"{n:>7} lignes | {pages:>5} pages | {elapsed:7.2f} s | "
+                f"{per_row:6.1f} µs/ligne (x{per_row / baseline:.2f}) | {size_kb:,.0f} Ko"
+            )
@@ -3,8 +3,10 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from spotipy.exceptions import SpotifyException
 
+from playlistwatcher.db import write_queue
 from tracker.models import Playlist, TaskStatus, SpotifyToken
 from tracker.spotify import get_client, search_discover_playlists
+from tracker.utils.playlist_stats import record_samples
 
 
 class Command(BaseCommand):
@@ -39,7 +41,7 @@ class Command(BaseCommand):
         try:
             found = 0
             for pl in search_discover_playlists(sp, max_per_query=max_per_query, max_total=max_total):
-                Playlist.objects.update_or_create(
+                playlist, _ = Playlist.objects.update_or_create(
                     spotify_id=pl["id"],
                     defaults={
                         "name": pl["name"],
@@ -48,9 +50,10 @@ class Command(BaseCommand):
                         "owner_url": pl["owner_url"],
                         "followers": pl["followers"],
                         "description": pl["description"],
-                        "last_checked": timezone.now(),
+                        "last_discovered": timezone.now(),
                     },
                 )
+                write_queue.run(record_samples, [(playlist.pk, pl["followers"], pl["tracks"])])
                 found += 1
                 self.stdout.write(self.style.SUCCESS(f"🎵 {pl['name']} ({pl['followers']} abonnés)"))
         except SpotifyException as e:
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from tracker.models import SpotifyToken
+from tracker.spotify import get_client
+from tracker.utils.artist_catalogue import import_artist_catalogue
+
+
+class Command(BaseCommand):
+    help = "Importe tous les titres (albums et singles) d'un artiste à partir de son ID Spotify."
+
+    def add_arguments(self, parser):
+        parser.add_argument("spotify_id", help="ID Spotify de l'artiste.")
+
+    def handle(self, *args, **opts):
+        token_obj = SpotifyToken.objects.first()
+        if not token_obj:
+            self.stdout.write(self.style.ERROR("Aucun token Spotify trouvé dans la base !"))
+            return
+
+        sp = get_client()
+        stats = import_artist_catalogue(sp, opts["spotify_id"].strip())
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['artist'].name} : {stats['albums']} albums, {stats['found']} titres trouvés, "
+            f"{stats['created']} créés, {stats['skipped']} déjà présents"
+        ))
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tracker.models import TaskStatus
+from tracker.spotify import get_client
+from tracker.utils.playlist_refresh import REFRESH_WORKERS, refresh_playlists
+from tracker.utils.playlist_stats import compact_stats
+
+
+class Command(BaseCommand):
+    help = "Rafraîchit les métadonnées (nom, description, abonnés, curateur) des playlists connues."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--budget",
+            type=int,
+            default=getattr(settings, "PLAYLIST_REFRESH_BUDGET", None),
+            help="Nombre maximum d'appels API (une playlist par appel), les plus suivies d'abord.",
+        )
+        parser.add_argument(
+            "--min-age-hours",
+            type=float,
+            default=24,
+            help="Ignore les playlists rafraîchies depuis moins de N heures.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "PLAYLIST_REFRESH_WORKERS", REFRESH_WORKERS),
+            help="Nombre d'appels Spotify concurrents (sous la limite de débit partagée).",
+        )
+
+    def handle(self, *args, **opts):
+        sp = get_client()
+        if not sp:
+            self.stdout.write(self.style.ERROR("Aucun client Spotify valide trouvé !"))
+            return
+
+        task_status, _ = TaskStatus.objects.get_or_create(name="refresh_playlists")
+        task_status.status = "running"
+        task_status.stop_requested = False
+        task_status.extra_info = "0 playlists modifiées"
+        task_status.extra_json = {"checked": 0, "changed": 0, "missing": 0, "errors": 0, "current": 0, "total": 0}
+        task_status.save()
+
+        try:
+            stats = refresh_playlists(
+                sp,
+                budget=opts["budget"],
+                min_age=timedelta(hours=opts["min_age_hours"]),
+                workers=opts["workers"],
+                status=task_status,
+            )
+            compact_stats()
+            task_status.status = "done"
+        except Exception as e:
+            task_status.status = "error"
+            task_status.extra_info = str(e)
+            raise
+        finally:
+            task_status.save(update_fields=["status", "extra_info"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Terminé. Vérifiées: {stats['checked']}, modifiées: {stats['changed']}, introuvables: {stats['missing']}, "
+            f"en erreur: {stats['errors']}"
+        ))
+        if stats["errors"]:
+            self.stdout.write(self.style.WARNING(f"Dernière erreur : {stats['last_error']}"))
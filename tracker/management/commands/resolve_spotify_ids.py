@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from tracker.models import SpotifyToken
+from tracker.spotify import get_client
+from tracker.utils.spotify_resolver import resolve_playlists, resolve_tracks
+
+
+class Command(BaseCommand):
+    help = "Remplace les identifiants temporaires (temp_) des titres et playlists importés par leur id Spotify."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Nombre maximum de titres et de playlists à traiter.",
+        )
+        parser.add_argument(
+            "--only",
+            choices=["tracks", "playlists"],
+            help="Ne résoudre que les titres ou que les playlists.",
+        )
+
+    def handle(self, *args, **opts):
+        token_obj = SpotifyToken.objects.first()
+        if not token_obj:
+            self.stdout.write(self.style.ERROR("Aucun token Spotify trouvé dans la base !"))
+            return
+
+        sp = get_client()
+        steps = {"tracks": ("Titres", resolve_tracks), "playlists": ("Playlists", resolve_playlists)}
+        for key, (label, resolve) in steps.items():
+            if opts["only"] and opts["only"] != key:
+                continue
+            stats = resolve(sp, opts["limit"])
+            self.stdout.write(self.style.SUCCESS(
+                f"{label} : {stats['pending']} en attente ({stats['names']} noms distincts), "
+                f"{stats['updated']} mis à jour, {stats['merged']} fusionnés"
+            ))
@@ -0,0 +1,18 @@
+from apscheduler.schedulers.blocking import BlockingScheduler
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tracker.scheduler import register_jobs
+
+
+class Command(BaseCommand):
+    help = "Lance le planificateur des tâches périodiques (rafraîchissement des playlists)."
+
+    def handle(self, *args, **opts):
+        scheduler = register_jobs(BlockingScheduler(timezone=settings.TIME_ZONE))
+        for job in scheduler.get_jobs():
+            self.stdout.write(f"⏱️ Tâche planifiée : {job.id} ({job.trigger})")
+        try:
+            scheduler.start()
+        except (KeyboardInterrupt, SystemExit):
+            self.stdout.write(self.style.WARNING("Planificateur arrêté."))
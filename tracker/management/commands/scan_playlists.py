@@ -1,15 +1,28 @@
 import time
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from spotipy.exceptions import SpotifyException
 
+from playlistwatcher.db import write_queue
 from tracker.models import Track, Playlist, Appearance, TaskStatus, SpotifyToken
 from tracker.spotify import get_client, search_playlists_for_track
+from tracker.utils.appearance_diff import apply_scan_diff
+from tracker.utils.playlist_stats import record_samples
+from tracker.utils.spotify_resolver import TEMP_PREFIX, resolve_pending_ids
 
 
 class Command(BaseCommand):
     help = "Scanne les playlists Spotify contenant chaque morceau et met à jour la base."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--resolve-limit",
+            type=int,
+            default=getattr(settings, "SCAN_RESOLVE_LIMIT", 200),
+            help="Nombre maximum de titres et de playlists temporaires résolus avant le scan.",
+        )
+
     def handle(self, *args, **opts):
         # Vérification du token global
         token_obj = SpotifyToken.objects.first()
@@ -26,20 +39,32 @@ class Command(BaseCommand):
         task_status.extra_json = {"created": 0, "updated": 0, "total": 0, "current": 0}
         task_status.save(update_fields=["status", "extra_info", "extra_json"])
 
-        tracks = Track.objects.all()
-        total_tracks = tracks.count()
-        created, updated = 0, 0
-        current_track_index = 0
+        created, updated, reactivated = 0, 0, 0
+        current_track_index, total_tracks = 0, 0
+        # Paires (titre, playlist) vérifiées / confirmées, comparées en fin de scan
+        verified, confirmed = set(), set()
 
         try:
+            # Étape préalable, bornée : une partie des titres / playlists importés reçoit son vrai id Spotify
+            resolved = resolve_pending_ids(sp, limit=opts["resolve_limit"])
+            self.stdout.write(
+                f"Ids Spotify résolus : {resolved['tracks']['updated'] + resolved['tracks']['merged']} titres, "
+                f"{resolved['playlists']['updated'] + resolved['playlists']['merged']} playlists"
+            )
+
+            # Les titres restés temporaires ne peuvent pas être cherchés par id
+            tracks = Track.objects.exclude(spotify_id__startswith=TEMP_PREFIX)
+            total_tracks = tracks.count()
+
             for t in tracks:
                 current_track_index += 1
                 self.stdout.write(self.style.MIGRATE_HEADING(f"→ {t.name} ({t.spotify_id})"))
+                checked = set()
 
                 while True:  # gestion des rate limits
                     try:
                         results = search_playlists_for_track(
-                            sp, t.spotify_id, t.name, artist_hint=t.artist.name
+                            sp, t.spotify_id, t.name, artist_hint=t.artist.name, checked=checked
                         )
                         break
                     except SpotifyException as e:
@@ -67,10 +92,20 @@ class Command(BaseCommand):
                         )
                     )
 
+                    write_queue.run(record_samples, [(playlist.pk, pl["followers"], pl["tracks"])])
+
+                    # Apparition confirmée : réactivée tout de suite ; les pertes sont réconciliées en fin de scan
+                    defaults = {"updated_on": timezone.now(), "position": pl["position"]}
+                    if pl["added_at"]:
+                        defaults["added_on"] = pl["added_at"]
                     app, was_created = Appearance.objects.update_or_create(
-                        track=t, playlist=playlist,
-                        defaults={"state": "found", "updated_on": timezone.now()}
+                        track=t, playlist=playlist, defaults=defaults, create_defaults={**defaults, "state": "found"}
                     )
+                    if app.state != "found":
+                        app.state = "found"
+                        app.save(update_fields=["state", "updated_at"])
+                        reactivated += 1
+                    confirmed.add((t.pk, pl["id"]))
 
                     if was_created:
                         created += 1
@@ -87,6 +122,13 @@ class Command(BaseCommand):
                     })
                     task_status.save(update_fields=["extra_info", "extra_json"])
 
+                verified.update((t.pk, pid) for pid in checked)
+
+            lost, found = apply_scan_diff(verified, confirmed)
+            reactivated += found
+            self.stdout.write(f"Apparitions perdues: {lost}, réactivées: {reactivated}")
+            task_status.extra_json.update({"lost": lost, "reactivated": reactivated})
+
         except Exception as e:
             task_status.status = "error"
             task_status.extra_info = str(e)
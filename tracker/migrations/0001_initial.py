@@ -0,0 +1,159 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:36
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Artist',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('spotify_id', models.CharField(blank=True, max_length=100, null=True, unique=True)),
+                ('spotify_url', models.URLField(blank=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ImportBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('kind', models.CharField(max_length=20)),
+                ('filename', models.CharField(blank=True, max_length=255)),
+                ('content_hash', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('applied_on', models.DateTimeField(blank=True, null=True)),
+                ('total', models.IntegerField(default=0)),
+                ('summary', models.JSONField(blank=True, default=dict)),
+                ('data_version', models.CharField(blank=True, max_length=16)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Playlist',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('spotify_id', models.CharField(max_length=100, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('url', models.URLField(blank=True)),
+                ('owner_name', models.CharField(blank=True, max_length=255)),
+                ('owner_url', models.URLField(blank=True)),
+                ('followers', models.IntegerField(blank=True, null=True)),
+                ('description', models.TextField(blank=True)),
+                ('discovered_on', models.DateTimeField(blank=True, null=True)),
+                ('last_discovered', models.DateTimeField(blank=True, null=True)),
+                ('last_scanned', models.DateTimeField(blank=True, null=True)),
+                ('last_refreshed', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SpotifyCredentials',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_id', models.CharField(blank=True, max_length=200, null=True)),
+                ('client_secret', models.CharField(blank=True, max_length=200, null=True)),
+                ('redirect_uri', models.URLField(blank=True, default='http://127.0.0.1:8000/spotify/callback')),
+                ('singleton', models.BooleanField(default=True, editable=False, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SpotifyToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('access_token', models.TextField()),
+                ('refresh_token', models.TextField()),
+                ('expires_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TaskStatus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('status', models.CharField(default='idle', max_length=50)),
+                ('stop_requested', models.BooleanField(default=False)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('extra_info', models.TextField(blank=True, null=True)),
+                ('extra_json', models.JSONField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Track',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('spotify_id', models.CharField(max_length=100, unique=True)),
+                ('spotify_url', models.URLField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True, null=True)),
+                ('artist', models.ForeignKey(default=1, on_delete=django.db.models.deletion.CASCADE, related_name='tracks', to='tracker.artist')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ImportedRowHash',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('row_hash', models.CharField(max_length=40)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='row_hashes', to='tracker.importbatch')),
+            ],
+            options={
+                'unique_together': {('kind', 'row_hash')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.IntegerField()),
+                ('status', models.CharField(default='new', max_length=20)),
+                ('row_hash', models.CharField(blank=True, max_length=40)),
+                ('data', models.JSONField()),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='tracker.importbatch')),
+            ],
+            options={
+                'ordering': ('position',),
+                'indexes': [models.Index(fields=['batch', 'status', 'position'], name='tracker_imp_batch_i_bebff1_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlaylistStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Jour'), ('week', 'Semaine'), ('month', 'Mois')], max_length=5)),
+                ('bucket', models.DateField()),
+                ('followers', models.IntegerField(blank=True, null=True)),
+                ('tracks', models.IntegerField(blank=True, null=True)),
+                ('playlist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='tracker.playlist')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'bucket'], name='tracker_pla_period_fc27b9_idx')],
+                'unique_together': {('playlist', 'period', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Appearance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('added_on', models.DateTimeField(blank=True, null=True)),
+                ('updated_on', models.DateTimeField(blank=True, null=True)),
+                ('state', models.CharField(default='new', max_length=50)),
+                ('contact', models.CharField(blank=True, max_length=255)),
+                ('position', models.PositiveIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True, null=True)),
+                ('playlist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appearances', to='tracker.playlist')),
+                ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appearances', to='tracker.track')),
+            ],
+            options={
+                'unique_together': {('track', 'playlist')},
+            },
+        ),
+    ]
@@ -1,4 +1,5 @@
 import datetime
+import uuid
 import requests
 from django.db import models
 from django.conf import settings
@@ -69,6 +70,7 @@ class Track(models.Model):
     artist = models.ForeignKey(Artist, on_delete=models.CASCADE, related_name="tracks", default=1)
     spotify_id = models.CharField(max_length=100, unique=True)
     spotify_url = models.URLField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True, null=True, db_index=True)  # version des exports en cache
 
     def save(self, *args, **kwargs):
         if self.spotify_id and not self.spotify_url:
@@ -90,6 +92,8 @@ class Playlist(models.Model):
     discovered_on = models.DateTimeField(blank=True, null=True)
     last_discovered = models.DateTimeField(blank=True, null=True)
     last_scanned = models.DateTimeField(blank=True, null=True)
+    last_refreshed = models.DateTimeField(blank=True, null=True)  # dernier rafraîchissement des métadonnées
+    updated_at = models.DateTimeField(auto_now=True, null=True, db_index=True)  # curseur des exports incrémentaux
 
     def __str__(self):
         return self.name
@@ -102,11 +106,32 @@ class Appearance(models.Model):
     updated_on = models.DateTimeField(blank=True, null=True)
     state = models.CharField(max_length=50, default="new")  # new, confirmed, lost…
     contact = models.CharField(max_length=255, blank=True)
+    position = models.PositiveIntegerField(blank=True, null=True)  # rang du titre dans la playlist (1 = premier)
+    updated_at = models.DateTimeField(auto_now=True, null=True, db_index=True)  # curseur des exports incrémentaux
 
     class Meta:
         unique_together = ("track", "playlist")
 
 
+class PlaylistStat(models.Model):
+    """
+    Série temporelle abonnés / nombre de titres d'une playlist.
+    Une ligne par (playlist, période, début de période) : chaque échantillon
+    met à jour les seaux jour, semaine et mois (dernière valeur vue).
+    """
+    PERIODS = (("day", "Jour"), ("week", "Semaine"), ("month", "Mois"))
+
+    playlist = models.ForeignKey(Playlist, on_delete=models.CASCADE, related_name="stats")
+    period = models.CharField(max_length=5, choices=PERIODS)
+    bucket = models.DateField()
+    followers = models.IntegerField(null=True, blank=True)
+    tracks = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("playlist", "period", "bucket")
+        indexes = [models.Index(fields=["period", "bucket"])]
+
+
 class TaskStatus(models.Model):
     name = models.CharField(max_length=100, unique=True)
     status = models.CharField(max_length=50, default="idle")  # idle, running, done
@@ -117,3 +142,44 @@ class TaskStatus(models.Model):
 
     def __str__(self):
         return f"{self.name}: {self.status}"
+
+
+class ImportBatch(models.Model):
+    """Import en attente de confirmation : lignes stockées en base, pas en session."""
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    kind = models.CharField(max_length=20)  # apparitions, playlists
+    filename = models.CharField(max_length=255, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)  # sha256 du fichier
+    created_on = models.DateTimeField(auto_now_add=True)
+    applied_on = models.DateTimeField(blank=True, null=True)
+    total = models.IntegerField(default=0)
+    summary = models.JSONField(default=dict, blank=True)  # {"new": x, "updated": y, "conflict": z, ...}
+    data_version = models.CharField(max_length=16, blank=True)  # version des données à la preview, puis après application
+
+    def __str__(self):
+        return f"Import {self.kind} ({self.total} lignes)"
+
+
+class ImportRow(models.Model):
+    batch = models.ForeignKey(ImportBatch, on_delete=models.CASCADE, related_name="rows")
+    position = models.IntegerField()
+    status = models.CharField(max_length=20, default="new")  # new, updated, conflict, unchanged, identical
+    row_hash = models.CharField(max_length=40, blank=True)
+    data = models.JSONField()
+
+    class Meta:
+        ordering = ("position",)
+        indexes = [models.Index(fields=["batch", "status", "position"])]
+
+
+class ImportedRowHash(models.Model):
+    """
+    Empreinte des lignes déjà importées : une ligne identique réimportée est ignorée
+    tant que les données n'ont pas changé depuis l'import (batch.data_version).
+    """
+    kind = models.CharField(max_length=20)
+    row_hash = models.CharField(max_length=40)
+    batch = models.ForeignKey(ImportBatch, on_delete=models.CASCADE, related_name="row_hashes")
+
+    class Meta:
+        unique_together = ("kind", "row_hash")
@@ -0,0 +1,51 @@
+"""
+Tâches planifiées (APScheduler), lancées par la commande run_scheduler.
+"""
+import traceback
+
+from apscheduler.triggers.interval import IntervalTrigger
+from django.conf import settings
+from django.core.management import call_command
+from django.db import close_old_connections
+
+
+def refresh_playlists_job():
+    close_old_connections()
+    try:
+        call_command("refresh_playlists", budget=settings.PLAYLIST_REFRESH_BUDGET)
+    except Exception as e:
+        print(f"Erreur rafraîchissement des playlists: {e}")
+        traceback.print_exc()
+    finally:
+        close_old_connections()
+
+
+def sync_radios_job():
+    close_old_connections()
+    try:
+        call_command("sync_radios")
+    except Exception as e:
+        print(f"Erreur synchronisation des radios: {e}")
+        traceback.print_exc()
+    finally:
+        close_old_connections()
+
+
+def register_jobs(scheduler):
+    scheduler.add_job(
+        refresh_playlists_job,
+        IntervalTrigger(hours=settings.PLAYLIST_REFRESH_INTERVAL_HOURS),
+        id="refresh_playlists",
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        sync_radios_job,
+        IntervalTrigger(hours=settings.RADIO_SYNC_INTERVAL_HOURS),
+        id="sync_radios",
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True,
+    )
+    return scheduler
@@ -1,5 +1,6 @@
-import os, time, datetime, requests, json
+import os, time, datetime, requests, json, threading
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.conf import settings
 from dotenv import load_dotenv
 from typing import Iterable, Dict
@@ -99,13 +100,38 @@ def get_client() -> spotipy.Spotify | None:
     auth = SpotifyClientCredentials(client_id=client_id, client_secret=client_secret)
     return spotipy.Spotify(client_credentials_manager=auth, requests_timeout=20, retries=3)
 
+class RateLimiter:
+    """
+    Limiteur partagé (par processus) : au plus `rate` appels par seconde,
+    tous threads confondus.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+spotify_rate_limiter = RateLimiter(float(os.getenv("SPOTIFY_MAX_CALLS_PER_SECOND", "5")))
+
+
 def safe_spotify_call(func, *args, **kwargs):
     """
     Exécute un appel Spotipy en gérant les rate limits (429).
+    Chaque appel passe par le limiteur partagé spotify_rate_limiter.
     - func : fonction Spotipy à appeler
     - args, kwargs : arguments de la fonction
     """
     while True:
+        spotify_rate_limiter.acquire()
         try:
             return func(*args, **kwargs)
         except spotipy.SpotifyException as e:
@@ -116,26 +142,40 @@ def safe_spotify_call(func, *args, **kwargs):
             else:
                 raise
 
-def playlist_contains_track(sp: spotipy.Spotify, playlist_id: str, track_id: str) -> bool:
+def find_track_in_playlist(sp: spotipy.Spotify, playlist_id: str, track_id: str) -> Dict | None:
+    """
+    Cherche le titre dans la playlist, page par page.
+    added_at et la position viennent des mêmes pages (aucun appel supplémentaire).
+    Retourne {"added_at": datetime | None, "position": int (1 = premier titre)} ou None.
+    """
     offset = 0
     while True:
-        items = safe_spotify_call(sp.playlist_items, playlist_id, fields="items.track.id,total,next", offset=offset, additional_types=["track"])
+        items = safe_spotify_call(sp.playlist_items, playlist_id, fields="items(added_at,track.id),total,next", offset=offset, additional_types=["track"])
         if not items or not items.get("items"):
-            return False
-        for it in items["items"]:
+            return None
+        for index, it in enumerate(items["items"]):
             t = it.get("track") or {}
             if t and t.get("id") == track_id:
-                return True
+                added_at = parse_datetime(it.get("added_at") or "")
+                # Spotify renvoie 1970-01-01 pour les ajouts très anciens (date inconnue)
+                if added_at and added_at.year <= 1970:
+                    added_at = None
+                return {"added_at": added_at, "position": offset + index + 1}
         if items.get("next"):
-            offset += 100
+            offset += len(items["items"])
         else:
-            return False
+            return None
+
+def playlist_contains_track(sp: spotipy.Spotify, playlist_id: str, track_id: str) -> bool:
+    return find_track_in_playlist(sp, playlist_id, track_id) is not None
 
-def search_playlists_for_track(sp: spotipy.Spotify, track_id: str, track_name: str, artist_hint: str = "Donkey Shots") -> Iterable[Dict]:
+def search_playlists_for_track(sp: spotipy.Spotify, track_id: str, track_name: str, artist_hint: str = "Donkey Shots", checked: set | None = None) -> Iterable[Dict]:
     """
     ⚠️ Limitation Spotify : pas d’endpoint 'toutes les playlists contenant X'.
     Stratégie : on effectue plusieurs recherches de playlists par mots-clés,
     puis on vérifie le contenu de chacune.
+    checked : ensemble optionnel complété avec l'id de chaque playlist dont le
+    contenu a été vérifié jusqu'au bout (contenant le titre ou non).
     """
     queries = [
         f'"{track_name}" "{artist_hint}"',
@@ -155,12 +195,15 @@ def search_playlists_for_track(sp: spotipy.Spotify, track_id: str, track_name: s
             if pid in seen:
                 continue
             seen.add(pid)
-            # Vérif contenu
-            if safe_spotify_call(playlist_contains_track, sp, pid, track_id):
+            # Vérif contenu (date d'ajout et position comprises)
+            placement = find_track_in_playlist(sp, pid, track_id)
+            if not placement and checked is not None:
+                checked.add(pid)
+            if placement:
                 try:
                     full = safe_spotify_call(sp.playlist,
                         pid,
-                        fields="id,name,external_urls.spotify,owner(display_name,external_urls.spotify),followers.total,description",
+                        fields="id,name,external_urls.spotify,owner(display_name,external_urls.spotify),followers.total,tracks.total,description",
                     )
                 except Exception as e:
                     print(f"⚠️ Impossible de récupérer playlist {pid}: {e}")
@@ -172,8 +215,13 @@ def search_playlists_for_track(sp: spotipy.Spotify, track_id: str, track_name: s
                     "owner_name": (full.get("owner") or {}).get("display_name") or "",
                     "owner_url": ((full.get("owner") or {}).get("external_urls") or {}).get("spotify", ""),
                     "followers": (full.get("followers") or {}).get("total", 0),
+                    "tracks": (full.get("tracks") or {}).get("total"),
                     "description": full.get("description") or "",
+                    "added_at": placement["added_at"],
+                    "position": placement["position"],
                 }
+                if checked is not None:
+                    checked.add(pid)
         time.sleep(0.4)  # douceur sur l’API
 
 
@@ -215,7 +263,7 @@ def search_discover_playlists(sp: spotipy.Spotify, max_per_query: int = 200, max
                     full = safe_spotify_call(
                         sp.playlist,
                         pid,
-                        fields="id,name,external_urls.spotify,owner(display_name,external_urls.spotify),followers.total,description",
+                        fields="id,name,external_urls.spotify,owner(display_name,external_urls.spotify),followers.total,tracks.total,description",
                     )
                 except Exception as e:
                     print(f"⚠️ Impossible de récupérer playlist {pid}: {e}")
@@ -229,6 +277,7 @@ def search_discover_playlists(sp: spotipy.Spotify, max_per_query: int = 200, max
                     "owner_name": (full.get("owner") or {}).get("display_name") or "",
                     "owner_url": ((full.get("owner") or {}).get("external_urls") or {}).get("spotify", ""),
                     "followers": (full.get("followers") or {}).get("total", 0),
+                    "tracks": (full.get("tracks") or {}).get("total"),
                     "description": full.get("description") or "",
                 }
 
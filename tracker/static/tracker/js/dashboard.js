@@ -235,3 +235,36 @@ document.addEventListener("DOMContentLoaded", () => {
 // ===== Auto-refresh toutes les 5s =====
 setInterval(updateStatuses, 5000);
 updateStatuses();
+
+// ===== Graphique de croissance des abonnés =====
+let followersChart = null;
+
+function loadFollowersChart() {
+    const canvas = document.getElementById("followers-chart");
+    const periodSelect = document.getElementById("stats-period");
+    if (!canvas || typeof Chart === "undefined") return;
+
+    fetch(`/stats/playlists/?period=${periodSelect ? periodSelect.value : "week"}`)
+        .then(resp => resp.json())
+        .then(data => {
+            const labels = data.series.map(p => p.bucket);
+            const followers = data.series.map(p => p.followers);
+            if (followersChart) followersChart.destroy();
+            followersChart = new Chart(canvas, {
+                type: "line",
+                data: {labels: labels, datasets: [{label: "Abonnés", data: followers, tension: 0.2}]},
+                options: {
+                    plugins: {
+                        legend: {display: false},
+                        tooltip: {callbacks: {afterLabel: ctx => `${data.series[ctx.dataIndex].playlists} playlists`}},
+                    },
+                },
+            });
+        });
+}
+
+document.addEventListener("DOMContentLoaded", function () {
+    const periodSelect = document.getElementById("stats-period");
+    if (periodSelect) periodSelect.addEventListener("change", loadFollowersChart);
+    loadFollowersChart();
+});
@@ -12,6 +12,7 @@ urlpatterns = [
     path("artists/add/", views.artist_create, name="artist_create"),
     path("artists/<int:pk>/edit/", views.artist_update, name="artist_update"),
     path("artist/<int:pk>/delete/", views.artist_delete, name="artist_delete"),
+    path("artists/import_catalogue/", views.artist_import_catalogue, name="artist_import_catalogue"),
     path("tracks/", views.track_list, name="track_list"),
     path("tracks/add/", views.track_create, name="track_create"),
     path("tracks/<int:pk>/edit/", views.track_update, name="track_update"),
@@ -26,12 +27,20 @@ urlpatterns = [
     path("scan_playlists/", views.run_scan_playlists, name="scan_playlists"),
     path("stop_scan_playlists/", views.stop_scan_playlists, name="stop_scan_playlists"),
     path("spotify_status/", views.spotify_status, name="spotify_status"),
+    path("stats/playlists/", views.playlist_stats, name="playlist_stats"),
 
     # ----- Import & Export management -----
     path("import_export/", views.import_export, name="import_export"),
     path("export/excel/", views.export_excel, name="export_excel"),
     path("export/pdf/", views.export_pdf, name="export_pdf"),
+    path("export/jobs/<str:kind>/start/", views.export_job_start, name="export_job_start"),
+    path("export/jobs/<slug:key>/status/", views.export_job_status, name="export_job_status"),
+    path("export/jobs/<slug:key>/download/", views.export_job_download, name="export_job_download"),
+    path("export/appearances/<str:fmt>/", views.export_appearances_stream, name="export_appearances_stream"),
+    path("export/playlists/<str:fmt>/", views.export_playlists_stream, name="export_playlists_stream"),
+    path("import/<uuid:token>/", views.import_preview, name="import_preview"),
     path("confirm-import/", views.confirm_import, name="confirm_import"),
+    path("import_status/", views.import_status, name="import_status"),
 
     # ----- Login & credentials management -----
     path("login/", views.spotify_login, name="spotify_login"),
@@ -0,0 +1,64 @@
+"""
+Détection des apparitions perdues en fin de scan.
+
+Le scan réactive ("found") chaque apparition confirmée au moment où il
+l'écrit, playlist par playlist. En fin de scan, seules les paires
+(titre, playlist) dont le contenu a été vérifié sont comparées aux
+apparitions existantes (différence d'ensembles) :
+- vérifiée mais non confirmée → "lost"
+- confirmée mais pas encore "found" (écrite hors du scan) → "found"
+Les playlists non vérifiées ne sont ni relues ni modifiées.
+"""
+from django.utils import timezone
+
+from playlistwatcher.db import write_queue
+
+from ..models import Appearance, Playlist
+
+DIFF_CHUNK_SIZE = 500
+
+
+def _chunks(items, size=DIFF_CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _set_state(pks, state, now):
+    for chunk in _chunks(pks):
+        Appearance.objects.filter(pk__in=chunk).update(state=state, updated_on=now, updated_at=now)
+
+
+def apply_scan_diff(verified, confirmed):
+    """
+    verified, confirmed : ensembles de (pk du titre, spotify_id de la playlist).
+    Retourne (perdues, réactivées).
+    """
+    pk_by_sid = {}
+    for chunk in _chunks({sid for _, sid in verified}):
+        pk_by_sid.update(Playlist.objects.filter(spotify_id__in=chunk).values_list("spotify_id", "pk"))
+    verified = {(t, pk_by_sid[sid]) for t, sid in verified if sid in pk_by_sid}
+    confirmed = {(t, pk_by_sid[sid]) for t, sid in confirmed if sid in pk_by_sid}
+
+    track_ids = {t for t, _ in verified}
+    lost, found = [], []
+    for chunk in _chunks({p for _, p in verified}):
+        existing = Appearance.objects.filter(track_id__in=track_ids, playlist_id__in=chunk).values_list(
+            "pk", "track_id", "playlist_id", "state"
+        )
+        for pk, track_id, playlist_id, state in existing:
+            pair = (track_id, playlist_id)
+            if pair not in verified:
+                continue
+            if pair in confirmed:
+                if state != "found":
+                    found.append(pk)
+            elif state != "lost":
+                lost.append(pk)
+
+    def write():
+        now = timezone.now()
+        _set_state(lost, "lost", now)
+        _set_state(found, "found", now)
+    write_queue.run(write)
+    return len(lost), len(found)
@@ -0,0 +1,139 @@
+"""
+Import du catalogue complet d'un artiste Spotify.
+
+Appels API (pour ~200 titres : une dizaine d'appels) :
+- albums et singles de l'artiste, paginés par 50
+- détail des albums par 20 (endpoint multi-ID, titres inclus ; pagination
+  complémentaire seulement pour les albums de plus de 50 titres)
+- détail des nouveaux titres par 50 (endpoint multi-ID)
+
+Les titres déjà en base (même spotify_id, ou même nom pour l'artiste :
+un single repris sur l'album n'est créé qu'une fois) sont ignorés ; les
+autres sont créés en bulk, en une transaction.
+"""
+from playlistwatcher.db import write_queue
+
+from ..models import Artist, Track
+from ..spotify import safe_spotify_call
+
+ALBUMS_PAGE_SIZE = 50
+ALBUMS_BATCH_SIZE = 20
+TRACKS_BATCH_SIZE = 50
+ALBUM_GROUPS = "album,single"
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def fetch_album_ids(sp, artist_id):
+    album_ids, offset = [], 0
+    while True:
+        page = safe_spotify_call(
+            sp.artist_albums, artist_id, include_groups=ALBUM_GROUPS, limit=ALBUMS_PAGE_SIZE, offset=offset
+        ) or {}
+        album_ids += [a["id"] for a in page.get("items") or [] if a and a.get("id")]
+        if not page.get("next"):
+            return list(dict.fromkeys(album_ids))
+        offset += ALBUMS_PAGE_SIZE
+
+
+def fetch_album_track_ids(sp, album_ids, artist_id):
+    """Ids des titres des albums où l'artiste figure, dans l'ordre des albums."""
+    track_ids = []
+    for batch in _batches(album_ids, ALBUMS_BATCH_SIZE):
+        for album in (safe_spotify_call(sp.albums, batch) or {}).get("albums") or []:
+            if not album:
+                continue
+            page = album.get("tracks") or {}
+            items = list(page.get("items") or [])
+            offset = len(items)
+            while page.get("next"):
+                page = safe_spotify_call(sp.album_tracks, album["id"], limit=50, offset=offset) or {}
+                items += page.get("items") or []
+                offset += 50
+            track_ids += [
+                t["id"] for t in items
+                if t and t.get("id") and artist_id in {a.get("id") for a in t.get("artists") or []}
+            ]
+    return list(dict.fromkeys(track_ids))
+
+
+def fetch_tracks(sp, track_ids):
+    tracks = []
+    for batch in _batches(track_ids, TRACKS_BATCH_SIZE):
+        tracks += [t for t in (safe_spotify_call(sp.tracks, batch) or {}).get("tracks") or [] if t and t.get("id")]
+    return tracks
+
+
+def _save_artist(artist_id, name, url):
+    """Exécuté par le writer unique."""
+    artist = Artist.objects.filter(spotify_id=artist_id).first()
+    if artist:
+        return artist
+    artist = Artist.objects.filter(name=name).first()
+    if artist is None or artist.spotify_id:
+        if artist is not None:
+            # Homonyme déjà lié à un autre id Spotify : c'est un autre artiste (name est unique)
+            name = f"{name} ({artist_id})"[:200]
+        artist = Artist(name=name)
+    # Un artiste du même nom sans id (créé à la main ou par un import) reçoit celui-ci
+    artist.spotify_id = artist_id
+    artist.spotify_url = url
+    artist.save()
+    return artist
+
+
+def get_or_create_artist(sp, artist_id):
+    """
+    Artiste par spotify_id ; sinon complète l'artiste du même nom s'il n'a pas
+    encore d'id Spotify, ou crée l'artiste. Un homonyme déjà lié à un autre id
+    n'est jamais modifié.
+    """
+    artist = Artist.objects.filter(spotify_id=artist_id).first()
+    if artist:
+        return artist
+    info = safe_spotify_call(sp.artist, artist_id)
+    url = (info.get("external_urls") or {}).get("spotify", "")
+    return write_queue.run(_save_artist, artist_id, info["name"], url)
+
+
+def _create_tracks(artist, tracks):
+    # Relecture sous le verrou d'écriture : un scan ou un import concurrent a pu créer des titres
+    existing_names = {n.casefold() for n in Track.objects.filter(artist=artist).values_list("name", flat=True)}
+    existing_ids = set(Track.objects.filter(spotify_id__in=[t["id"] for t in tracks]).values_list("spotify_id", flat=True))
+    to_create = []
+    for t in tracks:
+        if t["id"] in existing_ids or t["name"].casefold() in existing_names:
+            continue
+        existing_names.add(t["name"].casefold())
+        to_create.append(Track(
+            name=t["name"][:200],
+            artist=artist,
+            spotify_id=t["id"],
+            spotify_url=(t.get("external_urls") or {}).get("spotify") or f"https://open.spotify.com/track/{t['id']}",
+        ))
+    Track.objects.bulk_create(to_create, ignore_conflicts=True)
+    return len(to_create)
+
+
+def import_artist_catalogue(sp, artist_id):
+    """
+    Importe tous les titres de l'artiste ; retourne un dict de statistiques
+    (artist, albums, found, created, skipped).
+    """
+    artist = get_or_create_artist(sp, artist_id)
+    album_ids = fetch_album_ids(sp, artist_id)
+    track_ids = fetch_album_track_ids(sp, album_ids, artist_id)
+
+    known = set(Track.objects.filter(spotify_id__in=track_ids).values_list("spotify_id", flat=True))
+    tracks = fetch_tracks(sp, [tid for tid in track_ids if tid not in known])
+    created = write_queue.run(_create_tracks, artist, tracks)
+    return {
+        "artist": artist,
+        "albums": len(album_ids),
+        "found": len(track_ids),
+        "created": created,
+        "skipped": len(track_ids) - created,
+    }
@@ -0,0 +1,153 @@
+"""
+Lecture streaming des fichiers Excel d'import.
+
+- Les index de colonnes sont résolus une seule fois depuis la ligne d'en-tête.
+- Les hyperliens sont lus depuis la section <hyperlinks> de la feuille
+  (sans charger les cellules), puis les lignes sont parcourues en un seul
+  passage openpyxl read-only. Le xlsx est ouvert avec zipfile et la feuille
+  active localisée par workbook.xml et ses relations : aucun attribut privé
+  d'openpyxl n'est utilisé.
+- Le nettoyage est vectorisé avec pandas par paquets de lignes ; les lignes
+  sont émises une à une par un générateur.
+"""
+import posixpath
+import xml.etree.ElementTree as ET
+import zipfile
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils.cell import coordinate_from_string, column_index_from_string, range_boundaries
+
+PARSE_CHUNK_SIZE = 1000
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+
+
+def _rels_path(part_path):
+    return posixpath.join(posixpath.dirname(part_path), "_rels", posixpath.basename(part_path) + ".rels")
+
+
+def _relationships(archive, part_path):
+    """[(Id, Type, chemin cible dans l'archive)] des relations d'une partie du paquet."""
+    rels_path = _rels_path(part_path)
+    if rels_path not in archive.namelist():
+        return []
+    rels = []
+    for rel in ET.fromstring(archive.read(rels_path)).iter(f"{_NS_PKG_REL}Relationship"):
+        target = rel.get("Target") or ""
+        if rel.get("TargetMode") != "External":
+            if target.startswith("/"):
+                target = target.lstrip("/")
+            else:
+                target = posixpath.normpath(posixpath.join(posixpath.dirname(part_path), target))
+        rels.append((rel.get("Id"), rel.get("Type"), target))
+    return rels
+
+
+def active_sheet_path(archive):
+    """
+    Chemin dans l'archive de la feuille active (même choix que Workbook.active) :
+    _rels/.rels → workbook.xml → onglet activeTab de <sheets> → workbook.xml.rels.
+    """
+    workbook_path = next(
+        (t for _, type_, t in _relationships(archive, "") if type_ == _OFFICE_DOCUMENT_REL), "xl/workbook.xml"
+    )
+    workbook = ET.fromstring(archive.read(workbook_path))
+    view = workbook.find(f"{_NS_MAIN}bookViews/{_NS_MAIN}workbookView")
+    active = int(view.get("activeTab", 0)) if view is not None else 0
+    sheets = workbook.findall(f"{_NS_MAIN}sheets/{_NS_MAIN}sheet")
+    if not sheets:
+        return None
+    rel_id = sheets[min(active, len(sheets) - 1)].get(f"{_NS_REL}id")
+    return next((t for id_, _, t in _relationships(archive, workbook_path) if id_ == rel_id), None)
+
+
+def _sheet_hyperlinks(archive, sheet_path, columns):
+    """
+    Retourne {(ligne, colonne): cible} pour les hyperliens des colonnes demandées
+    (colonnes 1-based). Les éléments <row> sont libérés au fil de l'eau.
+    """
+    rels_path = _rels_path(sheet_path)
+    targets = {}
+    if rels_path in archive.namelist():
+        for rel in ET.fromstring(archive.read(rels_path)).iter(f"{_NS_PKG_REL}Relationship"):
+            targets[rel.get("Id")] = rel.get("Target")
+
+    links = {}
+    with archive.open(sheet_path) as f:
+        for _, el in ET.iterparse(f):
+            if el.tag == f"{_NS_MAIN}row":
+                el.clear()
+            elif el.tag == f"{_NS_MAIN}hyperlink":
+                target = targets.get(el.get(f"{_NS_REL}id")) or el.get("location") or ""
+                ref = el.get("ref", "")
+                if ":" in ref:
+                    min_col, min_row, max_col, max_row = range_boundaries(ref)
+                else:
+                    col, row = coordinate_from_string(ref)
+                    min_col = max_col = column_index_from_string(col)
+                    min_row = max_row = row
+                for c in range(min_col, max_col + 1):
+                    if c in columns:
+                        for r in range(min_row, max_row + 1):
+                            links[(r, c)] = target
+    return links
+
+
+def iter_sheet_rows(file, columns, link_columns=()):
+    """
+    Parcourt la feuille active et émet des paquets de lignes sous forme de DataFrame.
+    - columns : en-têtes à extraire (colonnes absentes → None)
+    - link_columns : en-têtes dont l'hyperlien est ajouté en colonne "<en-tête>URL"
+    """
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        positions = {name: i for i, name in enumerate(header) if name is not None}
+        indexes = [positions.get(name) for name in columns]
+        link_indexes = {name: positions[name] for name in link_columns if name in positions}
+
+        links = {}
+        if link_indexes:
+            with zipfile.ZipFile(file) as archive:
+                sheet_path = active_sheet_path(archive)
+                if sheet_path:
+                    links = _sheet_hyperlinks(archive, sheet_path, {i + 1 for i in link_indexes.values()})
+
+        chunk, excel_row = [], 1
+        for values in rows:
+            excel_row += 1
+            record = [values[i] if i is not None and i < len(values) else None for i in indexes]
+            record += [links.get((excel_row, i + 1), "") for i in link_indexes.values()]
+            chunk.append(record)
+            if len(chunk) == PARSE_CHUNK_SIZE:
+                yield pd.DataFrame(chunk, columns=list(columns) + [f"{n}URL" for n in link_indexes], dtype=object)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=list(columns) + [f"{n}URL" for n in link_indexes], dtype=object)
+    finally:
+        wb.close()
+
+
+def clean_text(col):
+    """Valeur vide → "", sinon texte."""
+    return col.where(col.notna(), "").astype(str)
+
+
+def clean_count(col):
+    """Nombre d'abonnés : espaces (insécables) retirés, flottants entiers ramenés à l'entier."""
+    text = clean_text(col).str.replace(r"\s", "", regex=True)
+    num = pd.to_numeric(text, errors="coerce")
+    integral = num.notna() & (num % 1 == 0)
+    return text.mask(integral, num[integral].astype("int64").astype(str))
+
+
+def clean_dates(col):
+    """Dates Excel ou ISO → "AAAA-MM-JJ" ; autre texte conservé tel quel."""
+    parsed = pd.to_datetime(col, errors="coerce", format="ISO8601")
+    return clean_text(col).mask(parsed.notna(), parsed.dt.strftime("%Y-%m-%d"))
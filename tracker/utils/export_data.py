@@ -1,44 +1,193 @@
+import tempfile
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from django.http import HttpResponse
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.platypus import Table, TableStyle
+from django.http import FileResponse
 from ..models import Appearance
 
-def export_apparitions_excel():
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Apparitions"
-    headers = ["Titre","Playlist","Curateur","Contact","Abonnés","Date d'ajout","Etat","Description","Mise à jour"]
-    ws.append(headers)
-    for app in Appearance.objects.select_related("track","playlist"):
-        row = [
-            app.track.name, app.playlist.name, app.playlist.owner_name,
-            app.contact, app.playlist.followers, app.added_on.date() if app.added_on else None,
-            app.state, app.playlist.description, app.updated_on.date() if app.updated_on else None
-        ]
-        ws.append(row)
-        r = ws.max_row
-        if app.playlist.url: ws.cell(row=r, column=2).hyperlink = app.playlist.url
-        if app.playlist.owner_url: ws.cell(row=r, column=3).hyperlink = app.playlist.owner_url
-    return wb
-
-def export_apparitions_pdf():
-    response = HttpResponse(content_type="application/pdf")
-    p = canvas.Canvas(response, pagesize=A4)
-    width, height = A4
-    y = height - 50
-    p.setFont("Helvetica-Bold", 14)
-    p.drawString(50, y, "Export des apparitions")
-    y -= 30
-    p.setFont("Helvetica", 10)
-    for app in Appearance.objects.select_related("track","playlist")[:100]:
-        text = f"{app.track.name} - {app.playlist.name} ({app.playlist.followers or 'N/A'} abonnés)"
-        p.drawString(50, y, text)
-        y -= 15
-        if y < 50:
-            p.showPage()
-            p.setFont("Helvetica", 10)
-            y = height - 50
+APPARITIONS_HEADERS = ["Titre","Playlist","Curateur","Contact","Abonnés","Date d'ajout","Etat","Description","Mise à jour"]
+APPARITIONS_FIELDS = (
+    "track__name", "playlist__name", "playlist__owner_name", "contact", "playlist__followers",
+    "added_on", "state", "playlist__description", "updated_on", "playlist__url", "playlist__owner_url",
+)
+EXPORT_CHUNK_SIZE = 2000
+
+# Exports CSV / NDJSON (voir playlistwatcher/streaming.py)
+APPEARANCE_STREAM_COLUMNS = {
+    "id": "id",
+    "track": "track__name",
+    "track_spotify_id": "track__spotify_id",
+    "artist": "track__artist__name",
+    "playlist": "playlist__name",
+    "playlist_spotify_id": "playlist__spotify_id",
+    "playlist_url": "playlist__url",
+    "curator": "playlist__owner_name",
+    "curator_url": "playlist__owner_url",
+    "followers": "playlist__followers",
+    "contact": "contact",
+    "state": "state",
+    "added_on": "added_on",
+    "updated_on": "updated_on",
+    "updated_at": "updated_at",
+}
+APPEARANCE_STREAM_FILTERS = {
+    "artist": "track__artist_id",
+    "track": "track_id",
+    "playlist": "playlist_id",
+    "state": "state",
+}
+PLAYLIST_STREAM_COLUMNS = {
+    "id": "id",
+    "spotify_id": "spotify_id",
+    "name": "name",
+    "url": "url",
+    "owner_name": "owner_name",
+    "owner_url": "owner_url",
+    "followers": "followers",
+    "description": "description",
+    "discovered_on": "discovered_on",
+    "last_discovered": "last_discovered",
+    "last_scanned": "last_scanned",
+    "updated_at": "updated_at",
+}
+PLAYLIST_STREAM_FILTERS = {
+    "owner_name": "owner_name",
+    "min_followers": "followers__gte",
+}
+
+PDF_HEADERS = ["Titre","Playlist","Curateur","Contact","Abonnés","Etat","Date d'ajout","Mise à jour"]
+PDF_COL_WIDTHS = [130, 170, 120, 120, 60, 55, 60, 60]
+PDF_ROWS_PER_PAGE = 35
+PDF_ROW_HEIGHT = 14
+PDF_MARGIN = 30
+PDF_TABLE_STYLE = TableStyle([
+    ("FONT", (0, 0), (-1, 0), "Helvetica-Bold", 8),
+    ("FONT", (0, 1), (-1, -1), "Helvetica", 7),
+    ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+    ("ALIGN", (4, 1), (4, -1), "RIGHT"),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+])
+
+
+def parse_filter_id(name, value):
+    """Id entier d'un filtre (None si vide) ; ValueError si la valeur n'est pas un entier."""
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Paramètre '{name}' invalide : {value}")
+
+
+def filter_apparitions(artist_id=None, track_id=None):
+    """
+    Apparitions filtrées par artiste et/ou titre (ids, valeurs vides ignorées).
+    Lève ValueError si un id n'est pas un entier.
+    """
+    artist_id, track_id = parse_filter_id("artist", artist_id), parse_filter_id("track", track_id)
+    queryset = Appearance.objects.all()
+    if artist_id:
+        queryset = queryset.filter(track__artist_id=artist_id)
+    if track_id:
+        queryset = queryset.filter(track_id=track_id)
+    return queryset
+
+
+def iter_apparitions(queryset=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Itère sur les apparitions en projection values() (pas d'instances de modèles),
+    par paquets de chunk_size lignes.
+    """
+    if queryset is None:
+        queryset = Appearance.objects.all()
+    return queryset.order_by("pk").values(*APPARITIONS_FIELDS).iterator(chunk_size=chunk_size)
+
+def export_apparitions_excel(fileobj=None, queryset=None, rows=None):
+    """
+    Export Excel en mode write-only : les lignes sont écrites au fil de l'eau,
+    la mémoire reste bornée quel que soit le nombre d'apparitions.
+    Écrit dans fileobj (fichier temporaire par défaut) et le retourne rembobiné.
+    rows : itérable de dicts APPARITIONS_FIELDS (par défaut lu depuis queryset).
+    """
+    if fileobj is None:
+        fileobj = tempfile.TemporaryFile()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Apparitions")
+    ws.append(APPARITIONS_HEADERS)
+    for app in rows if rows is not None else iter_apparitions(queryset):
+        playlist = WriteOnlyCell(ws, value=app["playlist__name"])
+        if app["playlist__url"]: playlist.hyperlink = app["playlist__url"]
+        curator = WriteOnlyCell(ws, value=app["playlist__owner_name"])
+        if app["playlist__owner_url"]: curator.hyperlink = app["playlist__owner_url"]
+        ws.append([
+            app["track__name"], playlist, curator,
+            app["contact"], app["playlist__followers"], app["added_on"].date() if app["added_on"] else None,
+            app["state"], app["playlist__description"], app["updated_on"].date() if app["updated_on"] else None
+        ])
+    wb.save(fileobj)
+    fileobj.seek(0)
+    return fileobj
+
+def _fit(value, max_chars):
+    """Tronque une cellule pour garder une hauteur de ligne fixe."""
+    text = "" if value is None else str(value)
+    return text if len(text) <= max_chars else text[:max_chars - 1] + "…"
+
+def _pdf_row(app):
+    return [
+        _fit(app["track__name"], 30),
+        _fit(app["playlist__name"], 40),
+        _fit(app["playlist__owner_name"], 28),
+        _fit(app["contact"], 28),
+        "N/A" if app["playlist__followers"] is None else f"{app['playlist__followers']:,}".replace(",", " "),
+        _fit(app["state"], 12),
+        app["added_on"].date().isoformat() if app["added_on"] else "",
+        app["updated_on"].date().isoformat() if app["updated_on"] else "",
+    ]
+
+def _draw_pdf_page(p, rows, page_number, title):
+    width, height = landscape(A4)
+    p.setFont("Helvetica-Bold", 12)
+    p.drawString(PDF_MARGIN, height - PDF_MARGIN, title)
+    p.setFont("Helvetica", 8)
+    p.drawRightString(width - PDF_MARGIN, PDF_MARGIN / 2, f"Page {page_number}")
+    table = Table([PDF_HEADERS] + rows, colWidths=PDF_COL_WIDTHS, rowHeights=PDF_ROW_HEIGHT)
+    table.setStyle(PDF_TABLE_STYLE)
+    _, table_height = table.wrapOn(p, width - 2 * PDF_MARGIN, height)
+    table.drawOn(p, PDF_MARGIN, height - PDF_MARGIN - 15 - table_height)
     p.showPage()
+
+def render_apparitions_pdf(rows, fileobj, title="Export des apparitions"):
+    """
+    Dessine les apparitions en tableaux paginés (PDF_ROWS_PER_PAGE lignes par page).
+    rows : itérable de dicts APPARITIONS_FIELDS, consommé au fil de l'eau ;
+    seules les lignes de la page en cours sont gardées en mémoire.
+    Retourne le nombre de pages.
+    """
+    p = canvas.Canvas(fileobj, pagesize=landscape(A4))
+    page_rows, page_number = [], 0
+    for app in rows:
+        page_rows.append(_pdf_row(app))
+        if len(page_rows) == PDF_ROWS_PER_PAGE:
+            page_number += 1
+            _draw_pdf_page(p, page_rows, page_number, title)
+            page_rows = []
+    if page_rows or page_number == 0:
+        page_number += 1
+        _draw_pdf_page(p, page_rows, page_number, title)
     p.save()
-    return response
+    return page_number
+
+def export_apparitions_pdf(artist_id=None, track_id=None):
+    """
+    Export PDF complet (toutes les apparitions, filtrables par artiste et titre).
+    Les lignes sont lues par paquets et rendues dans un fichier temporaire.
+    """
+    fileobj = tempfile.TemporaryFile()
+    render_apparitions_pdf(iter_apparitions(filter_apparitions(artist_id, track_id)), fileobj)
+    fileobj.seek(0)
+    return FileResponse(fileobj, as_attachment=True, filename="export.pdf", content_type="application/pdf")
@@ -0,0 +1,201 @@
+"""
+Exports en arrière-plan avec cache disque.
+
+Un artefact est identifié par (type d'export, filtres, version des données).
+Tant que les données ne changent pas, le fichier déjà généré est resservi ;
+sinon un thread le reconstruit et publie sa progression dans TaskStatus
+(nom ``export_<clé>``), comme le scan et la découverte.
+
+Chaque écriture de progression sert de heartbeat (TaskStatus.updated_on) :
+un job "running" muet depuis EXPORT_STALE_AFTER (worker tué) est relancé.
+"""
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from playlistwatcher.db import write_queue
+
+from ..models import Appearance, Playlist, Track, TaskStatus
+from .export_data import (
+    APPARITIONS_HEADERS, export_apparitions_excel, filter_apparitions, iter_apparitions, parse_filter_id,
+    render_apparitions_pdf,
+)
+
+EXPORT_PROGRESS_EVERY = 500
+EXPORT_STALE_AFTER = timedelta(minutes=15)
+
+EXPORT_KINDS = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+    "csv": "text/csv; charset=utf-8",
+}
+
+_lock = threading.Lock()
+
+
+def export_dir():
+    path = getattr(settings, "EXPORT_CACHE_DIR", settings.BASE_DIR / "exports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def data_version():
+    """
+    Empreinte des données exportées, calculée en quelques agrégats :
+    toute création, suppression ou mise à jour (updated_at, auto_now) la change.
+    """
+    parts = [
+        Appearance.objects.aggregate(n=Count("id"), last_id=Max("id"), last=Max("updated_at")),
+        Playlist.objects.aggregate(n=Count("id"), last=Max("updated_at")),
+        Track.objects.aggregate(n=Count("id"), last_id=Max("id"), last=Max("updated_at")),
+    ]
+    return hashlib.sha1(json.dumps(parts, default=str, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def clean_filters(artist_id=None, track_id=None):
+    """Filtres normalisés de l'export ; ValueError si un id est invalide."""
+    ids = {"artist": parse_filter_id("artist", artist_id), "track": parse_filter_id("track", track_id)}
+    return {k: str(v) for k, v in ids.items() if v}
+
+
+def _prefix(kind, filters):
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()[:12]
+    return f"{kind}_{digest}"
+
+
+def export_key(kind, filters, version=None):
+    """Clé de l'artefact : <type>_<hash filtres>_<version des données>."""
+    return f"{_prefix(kind, filters)}_{version or data_version()}"
+
+
+def artifact_path(key):
+    kind = key.split("_", 1)[0]
+    return os.path.join(export_dir(), f"{key}.{kind}")
+
+
+def _save_progress(status_pk, extra_json):
+    # update() ne déclenche pas auto_now : updated_on explicite (heartbeat)
+    TaskStatus.objects.filter(pk=status_pk).update(extra_json=extra_json, updated_on=timezone.now())
+
+
+def _with_progress(rows, status, total):
+    """
+    La progression est écrite par le writer unique : ce thread garde un curseur
+    de lecture ouvert et ne peut pas écrire lui-même (SQLITE_BUSY_SNAPSHOT en WAL).
+    """
+    status.extra_json.update({"current": 0, "total": total})
+    write_queue.submit(_save_progress, status.pk, dict(status.extra_json))
+    for i, row in enumerate(rows, start=1):
+        yield row
+        if i % EXPORT_PROGRESS_EVERY == 0:
+            status.extra_json["current"] = i
+            write_queue.submit(_save_progress, status.pk, dict(status.extra_json))
+
+
+def _write_csv(rows, fileobj):
+    writer = csv.writer(fileobj)
+    writer.writerow(APPARITIONS_HEADERS)
+    for app in rows:
+        writer.writerow([
+            app["track__name"], app["playlist__name"], app["playlist__owner_name"], app["contact"],
+            app["playlist__followers"], app["added_on"].date() if app["added_on"] else "",
+            app["state"], app["playlist__description"], app["updated_on"].date() if app["updated_on"] else "",
+        ])
+
+
+def build_artifact(kind, filters, path, status):
+    queryset = filter_apparitions(filters.get("artist"), filters.get("track"))
+    rows = _with_progress(iter_apparitions(queryset), status, queryset.count())
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.part"  # propre au job : un job relancé n'écrit pas le même fichier
+    if kind == "csv":
+        with open(tmp_path, "w", newline="", encoding="utf-8-sig") as f:
+            _write_csv(rows, f)
+    else:
+        with open(tmp_path, "wb") as f:
+            if kind == "xlsx":
+                export_apparitions_excel(fileobj=f, rows=rows)
+            else:
+                render_apparitions_pdf(rows, f)
+    os.replace(tmp_path, path)  # publication atomique
+
+
+def _prune_old_versions(kind, filters, key):
+    """
+    Supprime les artefacts terminés et les statuts des versions précédentes du
+    même export. Les fichiers .part en cours d'écriture (par un autre job) sont
+    laissés ; seuls ceux abandonnés depuis EXPORT_STALE_AFTER sont supprimés.
+    """
+    prefix = _prefix(kind, filters)
+    abandoned = time.time() - EXPORT_STALE_AFTER.total_seconds()
+    for name in os.listdir(export_dir()):
+        if not name.startswith(prefix) or name.startswith(key):
+            continue
+        path = os.path.join(export_dir(), name)
+        try:
+            if not name.endswith(".part") or os.path.getmtime(path) < abandoned:
+                os.remove(path)
+        except FileNotFoundError:  # publié ou supprimé entre-temps
+            pass
+    TaskStatus.objects.filter(name__startswith=f"export_{prefix}").exclude(name=f"export_{key}").exclude(
+        status="running", updated_on__gte=timezone.now() - EXPORT_STALE_AFTER
+    ).delete()
+
+
+def run_export_job_async(kind, filters, key):
+    status = TaskStatus.objects.get(name=f"export_{key}")
+    try:
+        build_artifact(kind, filters, artifact_path(key), status)
+        status.status = "done"
+        status.extra_json["current"] = status.extra_json.get("total", 0)
+        _prune_old_versions(kind, filters, key)
+    except Exception as e:
+        status.status = "error"
+        status.extra_info = str(e)
+        print(f"Erreur export {key}: {e}")
+        traceback.print_exc()
+    finally:
+        # Après les écritures de progression déjà en file
+        write_queue.run(status.save)
+
+
+def start_export_job(kind, filters):
+    """
+    Retourne la clé de l'export demandé ; lance sa génération en arrière-plan
+    si aucun artefact à jour n'existe et qu'aucun job vivant n'est déjà en cours.
+    """
+    key = export_key(kind, filters)
+    with _lock:
+        if os.path.exists(artifact_path(key)):
+            return key
+        status, _ = TaskStatus.objects.get_or_create(name=f"export_{key}")
+        if status.status == "running" and status.updated_on >= timezone.now() - EXPORT_STALE_AFTER:
+            return key
+        status.status = "running"
+        status.extra_info = ""
+        status.extra_json = {"kind": kind, "filters": filters, "current": 0, "total": 0}
+        status.save()
+    threading.Thread(target=run_export_job_async, args=(kind, filters, key), daemon=True).start()
+    return key
+
+
+def export_job_state(key):
+    """État d'un export pour le polling front (format des statuts scan/découverte)."""
+    ready = os.path.exists(artifact_path(key))
+    status = TaskStatus.objects.filter(name=f"export_{key}").first()
+    data = {"status": "done" if ready else "idle", "extra_info": "", "current": 0, "total": 0, "ready": ready}
+    if status:
+        data["status"] = "done" if ready else status.status
+        data["extra_info"] = status.extra_info or ""
+        data["current"] = (status.extra_json or {}).get("current", 0)
+        data["total"] = (status.extra_json or {}).get("total", 0)
+    return data
@@ -1,99 +1,199 @@
 import pandas as pd
 from datetime import datetime, date
+from django.utils import timezone
+from playlistwatcher.db import write_queue
 from ..models import Track, Playlist, Appearance
 
-def import_preview_apparitions(data, mode):
+IMPORT_BATCH_SIZE = 500
+
+
+def _batches(data, size=IMPORT_BATCH_SIZE):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+def _get_or_create_by_name(model, names, defaults_for):
+    """
+    Retourne {nom: instance} pour tous les noms, en créant les manquants en bulk.
+    defaults_for(nom) donne les champs de création (dont le spotify_id temporaire).
+    Un nom dont le spotify_id temporaire existe déjà est rattaché à cette ligne.
+    """
+    by_name = {}
+    for obj in model.objects.filter(name__in=names).order_by("pk"):
+        by_name.setdefault(obj.name, obj)
+    missing = [n for n in names if n not in by_name]
+    if missing:
+        new_objs = {n: model(name=n, **defaults_for(n)) for n in missing}
+        model.objects.bulk_create(new_objs.values(), ignore_conflicts=True)
+        for obj in model.objects.filter(name__in=missing).order_by("pk"):
+            by_name.setdefault(obj.name, obj)
+        leftovers = {new_objs[n].spotify_id: n for n in missing if n not in by_name}
+        for obj in model.objects.filter(spotify_id__in=leftovers):
+            by_name[leftovers[obj.spotify_id]] = obj
+    return by_name
+
+def _import_apparitions_batch(rows, mode):
     imported, updated = 0, 0
-    for row in data:
-        track, _ = Track.objects.get_or_create(name=row["Titre"] or "Inconnu",
-                                               defaults={"spotify_id": f"temp_{row['Titre'][:64]}"})
-        playlist, _ = Playlist.objects.get_or_create(
-            name=row["Playlist"] or "Sans nom",
-            defaults={
-                "spotify_id": f"temp_{row['Playlist'][:64]}",
-                "followers": clean_int(row["Abonnés"]),
-                "description": row["Description"],
-                "url": row["PlaylistURL"],
-                "owner_name": row["Curateur"],
-                "owner_url": row["CurateurURL"],
-            }
+    track_names, playlist_names = {}, {}
+    for row in rows:  # première ligne de chaque nom = valeurs de création
+        track_names.setdefault(row["Titre"] or "Inconnu", row)
+        playlist_names.setdefault(row["Playlist"] or "Sans nom", row)
+    tracks = _get_or_create_by_name(
+        Track, list(track_names),
+        lambda n: {"spotify_id": f"temp_{track_names[n]['Titre'][:64]}"},
+    )
+    playlists = _get_or_create_by_name(
+        Playlist, list(playlist_names),
+        lambda n: {
+            "spotify_id": f"temp_{playlist_names[n]['Playlist'][:64]}",
+            "followers": clean_int(playlist_names[n]["Abonnés"]),
+            "description": playlist_names[n]["Description"],
+            "url": playlist_names[n]["PlaylistURL"],
+            "owner_name": playlist_names[n]["Curateur"],
+            "owner_url": playlist_names[n]["CurateurURL"],
+        },
+    )
+
+    appearances = {
+        (a.track_id, a.playlist_id): a
+        for a in Appearance.objects.filter(
+            track_id__in={t.pk for t in tracks.values()},
+            playlist_id__in={p.pk for p in playlists.values()},
         )
+    }
+    to_create, to_update = {}, {}
+    for row in rows:
+        track = tracks[row["Titre"] or "Inconnu"]
+        playlist = playlists[row["Playlist"] or "Sans nom"]
+        key = (track.pk, playlist.pk)
         added_on = clean_date(row["Date d'ajout"])
         updated_on = clean_date(row["Mise à jour"]) or datetime.today().date()
-        appearance, created = Appearance.objects.get_or_create(
-            track=track, playlist=playlist,
-            defaults={
-                "contact": row["Contact"], "state": row["Etat"],
-                "added_on": added_on, "updated_on": updated_on
-            }
-        )
-        if created:
+        appearance = appearances.get(key)
+        if appearance is None:
+            appearance = Appearance(
+                track=track, playlist=playlist,
+                contact=row["Contact"], state=row["Etat"],
+                added_on=added_on, updated_on=updated_on,
+            )
+            appearances[key] = to_create[key] = appearance
             imported += 1
-        else:
-            if mode == "overwrite":
-                appearance.contact = row["Contact"] or appearance.contact
-                appearance.state = row["Etat"] or appearance.state
-                appearance.added_on = added_on or appearance.added_on
+        elif mode == "overwrite":
+            appearance.contact = row["Contact"] or appearance.contact
+            appearance.state = row["Etat"] or appearance.state
+            appearance.added_on = added_on or appearance.added_on
+            appearance.updated_on = updated_on
+            updated += 1
+            if key not in to_create:
+                to_update[key] = appearance
+        elif mode == "complete":
+            changed = False
+            if not appearance.contact and row["Contact"]:
+                appearance.contact = row["Contact"]
+                changed = True
+            if not appearance.state and row["Etat"]:
+                appearance.state = row["Etat"]
+                changed = True
+            if not appearance.added_on and added_on:
+                appearance.added_on = added_on
+                changed = True
+            if changed:
                 appearance.updated_on = updated_on
-                appearance.save()
                 updated += 1
-            elif mode == "complete":
-                changed = False
-                if not appearance.contact and row["Contact"]:
-                    appearance.contact = row["Contact"]
-                    changed = True
-                if not appearance.state and row["Etat"]:
-                    appearance.state = row["Etat"]
-                    changed = True
-                if not appearance.added_on and added_on:
-                    appearance.added_on = added_on
-                    changed = True
-                if changed:
-                    appearance.updated_on = updated_on
-                    appearance.save()
-                    updated += 1
+                if key not in to_create:
+                    to_update[key] = appearance
+
+    now = timezone.now()
+    for appearance in to_update.values():
+        appearance.updated_at = now  # bulk_update ne déclenche pas auto_now
+    Appearance.objects.bulk_create(to_create.values())
+    Appearance.objects.bulk_update(to_update.values(), ["contact", "state", "added_on", "updated_on", "updated_at"])
     return imported, updated
 
-def import_preview_playlists(data, mode):
+def import_preview_apparitions(data, mode):
+    """
+    Import des apparitions par lots : titres, playlists et apparitions existants
+    sont préchargés en quelques requêtes, puis créés / mis à jour en bulk.
+    Chaque lot est une transaction exécutée par le writer unique.
+    """
     imported, updated = 0, 0
-    for row in data:
-        playlist, created = Playlist.objects.get_or_create(
-            name=row["Nom"] or "Sans nom",
-            defaults={
-                "spotify_id": f"temp_{row['Nom'][:64]}",
-                "url": row["URL"],
-                "owner_name": row["Curateur"],
-                "followers": clean_int(row["Abonnés"]),
-                "description": row["Description"]
-            }
-        )
-        if created:
+    for rows in _batches(data):
+        i, u = write_queue.run(_import_apparitions_batch, rows, mode)
+        imported += i
+        updated += u
+    return imported, updated
+
+def _import_playlists_batch(rows, mode):
+    imported, updated = 0, 0
+    names = [row["Nom"] or "Sans nom" for row in rows]
+    playlists = {}
+    for p in Playlist.objects.filter(name__in=names).order_by("pk"):
+        playlists.setdefault(p.name, p)
+    to_create, to_update = {}, {}
+    for row, name in zip(rows, names):
+        playlist = playlists.get(name)
+        if playlist is None:
+            playlist = Playlist(
+                name=name,
+                spotify_id=f"temp_{row['Nom'][:64]}",
+                url=row["URL"],
+                owner_name=row["Curateur"],
+                followers=clean_int(row["Abonnés"]),
+                description=row["Description"],
+            )
+            playlists[name] = to_create[name] = playlist
             imported += 1
-        else:
-            if mode == "overwrite":
-                playlist.url = row["URL"] or playlist.url
-                playlist.owner_name = row["Curateur"] or playlist.owner_name
-                playlist.followers = clean_int(row["Abonnés"]) or playlist.followers
-                playlist.description = row["Description"] or playlist.description
-                playlist.save()
+        elif mode == "overwrite":
+            playlist.url = row["URL"] or playlist.url
+            playlist.owner_name = row["Curateur"] or playlist.owner_name
+            playlist.followers = clean_int(row["Abonnés"]) or playlist.followers
+            playlist.description = row["Description"] or playlist.description
+            updated += 1
+            if name not in to_create:
+                to_update[name] = playlist
+        elif mode == "complete":
+            changed = False
+            if not playlist.url and row["URL"]:
+                playlist.url = row["URL"]
+                changed = True
+            if not playlist.owner_name and row["Curateur"]:
+                playlist.owner_name = row["Curateur"]
+                changed = True
+            if not playlist.followers and row["Abonnés"]:
+                playlist.followers = clean_int(row["Abonnés"])
+                changed = True
+            if not playlist.description and row["Description"]:
+                playlist.description = row["Description"]
+                changed = True
+            if changed:
                 updated += 1
-            elif mode == "complete":
-                changed = False
-                if not playlist.url and row["URL"]:
-                    playlist.url = row["URL"]
-                    changed = True
-                if not playlist.owner_name and row["Curateur"]:
-                    playlist.owner_name = row["Curateur"]
-                    changed = True
-                if not playlist.followers and row["Abonnés"]:
-                    playlist.followers = clean_int(row["Abonnés"])
-                    changed = True
-                if not playlist.description and row["Description"]:
-                    playlist.description = row["Description"]
-                    changed = True
-                if changed:
-                    playlist.save()
-                    updated += 1
+                if name not in to_create:
+                    to_update[name] = playlist
+
+    if to_create:
+        # spotify_id temporaire déjà pris (nom tronqué identique) : la ligne existante est gardée,
+        # comme pour les titres et playlists des apparitions, au lieu d'annuler tout le lot
+        Playlist.objects.bulk_create(to_create.values(), ignore_conflicts=True)
+        inserted = set(
+            Playlist.objects.filter(spotify_id__in=[p.spotify_id for p in to_create.values()], name__in=to_create)
+            .values_list("name", "spotify_id")
+        )
+        imported -= sum((name, p.spotify_id) not in inserted for name, p in to_create.items())
+    now = timezone.now()
+    for playlist in to_update.values():
+        playlist.updated_at = now  # bulk_update ne déclenche pas auto_now
+    Playlist.objects.bulk_update(
+        to_update.values(), ["url", "owner_name", "followers", "description", "updated_at"]
+    )
+    return imported, updated
+
+def import_preview_playlists(data, mode):
+    """
+    Import des playlists par lots (préchargement par nom, bulk_create / bulk_update).
+    """
+    imported, updated = 0, 0
+    for rows in _batches(data):
+        i, u = write_queue.run(_import_playlists_batch, rows, mode)
+        imported += i
+        updated += u
     return imported, updated
 
 def clean_date(value):
@@ -0,0 +1,221 @@
+"""
+Zone de staging des imports Excel.
+
+Les lignes parsées sont écrites une seule fois en base (ImportBatch / ImportRow),
+classées par rapport aux données existantes :
+- new : la ligne créera un enregistrement
+- updated : elle complète des champs vides
+- conflict : elle contient des valeurs différentes de celles en base
+  (remplacées en mode "overwrite", ignorées en mode "complete")
+- unchanged : rien à faire
+- identical : ligne strictement identique à une ligne déjà importée (même
+  empreinte) alors qu'aucune donnée n'a changé depuis cet import
+  (ImportBatch.data_version = data_version() courant) : non reclassée ni
+  réappliquée. Dès que les données changent, les empreintes deviennent
+  caduques, sont purgées et les lignes sont reclassées normalement.
+
+Seules les lignes réellement appliquées enregistrent leur empreinte : en mode
+"complete", les conflits (non écrits) restent réimportables en "overwrite".
+
+Le fichier est lui aussi haché : un fichier déjà importé est signalé, mais
+toujours reclassé par rapport aux données actuelles.
+
+La preview est paginée depuis la base et la confirmation applique l'import
+directement depuis le staging ; la session ne contient que le token.
+"""
+import hashlib
+import json
+from collections import Counter
+from datetime import timedelta
+from itertools import islice
+
+from django.utils import timezone
+
+from playlistwatcher.db import write_queue
+
+from ..models import Appearance, ImportBatch, ImportedRowHash, ImportRow, Playlist
+from .export_jobs import data_version
+from .import_data import clean_date, clean_int, import_preview_apparitions, import_preview_playlists
+
+STAGING_CHUNK_SIZE = 1000
+STAGING_TTL = timedelta(days=1)
+ROW_STATUSES = ("new", "updated", "conflict", "unchanged", "identical")
+
+
+def _chunks(iterable, size=STAGING_CHUNK_SIZE):
+    it = iter(iterable)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def file_hash(file):
+    """sha256 d'un fichier uploadé, lu par morceaux ; le fichier est rembobiné."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def row_hash(row):
+    return hashlib.sha1(json.dumps(row, sort_keys=True, ensure_ascii=False, default=str).encode()).hexdigest()
+
+
+def find_applied_batch(kind, content_hash):
+    """Dernier import appliqué du même fichier, sinon None."""
+    return (
+        ImportBatch.objects.filter(kind=kind, content_hash=content_hash, applied_on__isnull=False)
+        .order_by("-applied_on").first()
+    )
+
+
+def _compare(pairs):
+    """pairs : (valeur en base, valeur importée) → statut updated / conflict / unchanged."""
+    if any(stored and incoming and stored != incoming for stored, incoming in pairs):
+        return "conflict"
+    if any(not stored and incoming for stored, incoming in pairs):
+        return "updated"
+    return "unchanged"
+
+
+def _classify_apparitions(rows):
+    playlists = {}
+    for p in Playlist.objects.filter(name__in={r["Playlist"] or "Sans nom" for r in rows}).order_by("pk"):
+        playlists.setdefault(p.name, p.pk)
+    existing = {
+        (a.track.name, a.playlist_id): a
+        for a in Appearance.objects.filter(
+            track__name__in={r["Titre"] or "Inconnu" for r in rows},
+            playlist_id__in=playlists.values(),
+        ).select_related("track").order_by("-pk")
+    }
+    statuses, seen = [], set()
+    for r in rows:
+        title, playlist_name = r["Titre"] or "Inconnu", r["Playlist"] or "Sans nom"
+        appearance = existing.get((title, playlists.get(playlist_name)))
+        if appearance is None:
+            # Doublon d'une ligne nouvelle du même fichier : elle la complètera
+            statuses.append("updated" if (title, playlist_name) in seen else "new")
+            seen.add((title, playlist_name))
+            continue
+        statuses.append(_compare([
+            (appearance.contact, r["Contact"]),
+            (appearance.state, r["Etat"]),
+            (appearance.added_on.date() if appearance.added_on else None, clean_date(r["Date d'ajout"])),
+        ]))
+    return statuses
+
+
+def _classify_playlists(rows):
+    existing = {}
+    for p in Playlist.objects.filter(name__in={r["Nom"] or "Sans nom" for r in rows}).order_by("pk"):
+        existing.setdefault(p.name, p)
+    statuses, seen = [], set()
+    for r in rows:
+        name = r["Nom"] or "Sans nom"
+        playlist = existing.get(name)
+        if playlist is None:
+            statuses.append("updated" if name in seen else "new")
+            seen.add(name)
+            continue
+        statuses.append(_compare([
+            (playlist.url, r["URL"]),
+            (playlist.owner_name, r["Curateur"]),
+            (playlist.followers, clean_int(r["Abonnés"])),
+            (playlist.description, r["Description"]),
+        ]))
+    return statuses
+
+
+def purge_expired_batches():
+    """Supprime les imports jamais confirmés (les imports appliqués restent comme historique)."""
+    ImportBatch.objects.filter(applied_on__isnull=True, created_on__lt=timezone.now() - STAGING_TTL).delete()
+
+
+def purge_stale_hashes(version):
+    """Supprime les empreintes des imports antérieurs à la dernière modification des données."""
+    ImportedRowHash.objects.filter(batch__applied_on__isnull=False).exclude(batch__data_version=version).delete()
+
+
+def stage_import(kind, rows, filename="", content_hash=""):
+    """
+    Écrit les lignes (itérable de dicts de preview) dans un nouvel ImportBatch,
+    par paquets, et retourne le batch avec son résumé.
+    """
+    purge_expired_batches()
+    version = data_version()
+    purge_stale_hashes(version)
+    classify = _classify_apparitions if kind == "apparitions" else _classify_playlists
+    batch = ImportBatch.objects.create(
+        kind=kind, filename=filename[:255], content_hash=content_hash, data_version=version
+    )
+    position, counts = 0, Counter()
+    for chunk in _chunks(rows):
+        hashes = [row_hash(data) for data in chunk]
+        # Empreintes encore valides : ces lignes ne sont pas comparées à la base
+        known = set(
+            ImportedRowHash.objects.filter(kind=kind, row_hash__in=hashes, batch__data_version=version)
+            .values_list("row_hash", flat=True)
+        )
+        to_classify = [data for data, h in zip(chunk, hashes) if h not in known]
+        classified = iter(classify(to_classify) if to_classify else [])
+        statuses = ["identical" if h in known else next(classified) for h in hashes]
+        counts.update(statuses)
+        ImportRow.objects.bulk_create([
+            ImportRow(batch=batch, position=position + i, status=status, row_hash=h, data=data)
+            for i, (data, status, h) in enumerate(zip(chunk, statuses, hashes))
+        ])
+        position += len(chunk)
+
+    batch.total = position
+    batch.summary = {status: counts.get(status, 0) for status in ROW_STATUSES}
+    batch.save(update_fields=["total", "summary"])
+    return batch
+
+
+def _record_hashes(batch, hashes):
+    ImportedRowHash.objects.bulk_create(
+        [ImportedRowHash(kind=batch.kind, row_hash=h, batch=batch) for h in hashes],
+        update_conflicts=True, unique_fields=["kind", "row_hash"], update_fields=["batch"],
+    )
+
+
+def apply_staged_import(batch, mode, progress=None):
+    """
+    Applique l'import depuis le staging (lignes "identical" ignorées, sauf si les
+    données ont changé depuis la preview), enregistre
+    l'empreinte des lignes appliquées (pas des conflits en mode "complete")
+    puis vide le staging.
+    Les lignes sont relues par paquets (pagination sur position) : aucun curseur
+    ne reste ouvert pendant les écritures.
+    progress(courant, total) est appelé après chaque paquet.
+    Retourne (importées, mises à jour).
+    """
+    importer = import_preview_apparitions if batch.kind == "apparitions" else import_preview_playlists
+    pending = batch.rows.order_by("position")
+    if data_version() == batch.data_version:
+        # Données inchangées depuis la preview : les lignes "identical" le sont toujours
+        pending = pending.exclude(status="identical")
+    total = pending.count()
+    imported, updated, done, last = 0, 0, 0, -1
+    rows = pending.values_list("position", "data", "row_hash", "status")
+    while chunk := list(rows.filter(position__gt=last)[:STAGING_CHUNK_SIZE]):
+        i, u = importer([data for _, data, _, _ in chunk], mode)
+        applied = [h for _, _, h, status in chunk if mode == "overwrite" or status != "conflict"]
+        if applied:
+            write_queue.run(_record_hashes, batch, applied)
+        imported += i
+        updated += u
+        done += len(chunk)
+        last = chunk[-1][0]
+        if progress:
+            progress(done, total)
+
+    def finish():
+        batch.rows.all().delete()
+        batch.applied_on = timezone.now()
+        # Version des données après l'import : les empreintes restent valides tant qu'elle ne change pas
+        batch.data_version = data_version()
+        batch.save(update_fields=["applied_on", "data_version"])
+    write_queue.run(finish)
+    return imported, updated
@@ -0,0 +1,142 @@
+"""
+Rafraîchissement des métadonnées des playlists connues (nom, description,
+abonnés, curateur).
+
+- Projection minimale : un appel `playlist` par playlist, sans les titres.
+- Appels concurrents (pool de threads), bornés par spotify_rate_limiter.
+- Budget : nombre maximum d'appels par exécution ; les playlists les plus
+  suivies passent en premier, parmi celles non rafraîchies depuis `min_age`.
+- Chaque playlist vue ajoute un échantillon abonnés / titres à PlaylistStat.
+- Une erreur sur une playlist est comptée ("errors") et n'interrompt pas le
+  rafraîchissement : la playlist reçoit last_refreshed et sera réessayée
+  après `min_age`. Si tout un paquet échoue (token, réseau…), l'erreur est
+  propagée.
+- Comparaison en mémoire : seules les lignes réellement modifiées sont
+  réécrites (un bulk_update par paquet) ; les autres ne reçoivent que
+  last_refreshed, en une requête, sans toucher updated_at.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import spotipy
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from playlistwatcher.db import write_queue
+
+from ..models import Playlist, TaskStatus
+from ..spotify import safe_spotify_call
+from .playlist_stats import record_samples
+from .spotify_resolver import TEMP_PREFIX
+
+REFRESH_BATCH_SIZE = 200
+REFRESH_WORKERS = 4  # défaut de settings.PLAYLIST_REFRESH_WORKERS
+REFRESH_MIN_AGE = timedelta(days=1)
+PLAYLIST_META_FIELDS = "name,description,external_urls.spotify,owner(display_name,external_urls.spotify),followers.total,tracks.total"
+REFRESHED_FIELDS = ("name", "description", "url", "owner_name", "owner_url", "followers")
+
+
+def _fetch_meta(sp, spotify_id):
+    """(métadonnées projetées, nombre de titres) d'une playlist ; None si elle n'existe plus."""
+    try:
+        full = safe_spotify_call(sp.playlist, spotify_id, fields=PLAYLIST_META_FIELDS)
+    except spotipy.SpotifyException as e:
+        if e.http_status in (400, 404):
+            return None
+        raise
+    owner = full.get("owner") or {}
+    return {
+        "name": (full.get("name") or "")[:255],
+        "description": full.get("description") or "",
+        "url": (full.get("external_urls") or {}).get("spotify", ""),
+        "owner_name": (owner.get("display_name") or "")[:255],
+        "owner_url": (owner.get("external_urls") or {}).get("spotify", ""),
+        "followers": (full.get("followers") or {}).get("total"),
+    }, (full.get("tracks") or {}).get("total")
+
+
+def _fetch_safely(sp, spotify_id):
+    """_fetch_meta, l'exception éventuelle étant retournée au lieu d'être levée."""
+    try:
+        return _fetch_meta(sp, spotify_id)
+    except Exception as e:
+        return e
+
+
+def refresh_queryset(min_age=REFRESH_MIN_AGE):
+    """Playlists à rafraîchir, par ordre de priorité (abonnés décroissants)."""
+    stale = Q(last_refreshed__isnull=True) | Q(last_refreshed__lt=timezone.now() - min_age)
+    return (
+        Playlist.objects.exclude(spotify_id__startswith=TEMP_PREFIX)
+        .filter(stale)
+        .order_by(F("followers").desc(nulls_last=True), "pk")
+    )
+
+
+def _write_batch(changed, unchanged_pks, samples, now):
+    for playlist in changed:
+        playlist.last_refreshed = now
+        playlist.updated_at = now  # bulk_update ne déclenche pas auto_now
+    Playlist.objects.bulk_update(changed, [*REFRESHED_FIELDS, "last_refreshed", "updated_at"])
+    Playlist.objects.filter(pk__in=unchanged_pks).update(last_refreshed=now)
+    record_samples(samples, now)
+
+
+def refresh_playlists(sp, budget=None, min_age=REFRESH_MIN_AGE, workers=None, status=None):
+    """
+    Rafraîchit au plus `budget` playlists (un appel API chacune).
+    workers : appels concurrents (défaut settings.PLAYLIST_REFRESH_WORKERS).
+    status : TaskStatus optionnel, pour la progression et l'arrêt demandé.
+    Retourne {"checked", "changed", "missing", "errors", "last_error"}.
+    """
+    workers = workers or getattr(settings, "PLAYLIST_REFRESH_WORKERS", REFRESH_WORKERS)
+    queryset = refresh_queryset(min_age)
+    total = queryset.count() if budget is None else min(budget, queryset.count())
+    stats = {"checked": 0, "changed": 0, "missing": 0, "errors": 0, "last_error": ""}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while stats["checked"] < total:
+            # Paquet relu à chaque tour (liste, pas de curseur ouvert pendant les écritures).
+            # Chaque playlist du paquet reçoit last_refreshed : elle sort du queryset, sans liste d'exclusion.
+            size = min(REFRESH_BATCH_SIZE, total - stats["checked"])
+            batch = list(queryset[:size])
+            if not batch:
+                break
+
+            metas = list(pool.map(lambda p: _fetch_safely(sp, p.spotify_id), batch))
+            errors = [e for e in metas if isinstance(e, Exception)]
+            if errors and len(errors) == len(batch):
+                raise errors[0]
+            changed, unchanged_pks, samples = [], [], []
+            for playlist, fetched in zip(batch, metas):
+                if isinstance(fetched, Exception):
+                    stats["errors"] += 1
+                    stats["last_error"] = f"{playlist.spotify_id} : {fetched}"
+                    unchanged_pks.append(playlist.pk)
+                    continue
+                if fetched is None:
+                    stats["missing"] += 1
+                    unchanged_pks.append(playlist.pk)
+                    continue
+                meta, tracks = fetched
+                samples.append((playlist.pk, meta["followers"], tracks))
+                diff = {f: v for f, v in meta.items() if v is not None and getattr(playlist, f) != v}
+                if diff:
+                    for f, v in diff.items():
+                        setattr(playlist, f, v)
+                    changed.append(playlist)
+                else:
+                    unchanged_pks.append(playlist.pk)
+
+            write_queue.run(_write_batch, changed, unchanged_pks, samples, timezone.now())
+            stats["checked"] += len(batch)
+            stats["changed"] += len(changed)
+
+            if status is not None:
+                status.extra_info = f"{stats['changed']} playlists modifiées sur {stats['checked']} vérifiées"
+                status.extra_json = {**stats, "current": stats["checked"], "total": total}
+                status.save(update_fields=["extra_info", "extra_json"])
+                if TaskStatus.objects.filter(pk=status.pk, stop_requested=True).exists():
+                    break
+    return stats
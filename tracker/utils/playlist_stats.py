@@ -0,0 +1,138 @@
+"""
+Historique des abonnés et du nombre de titres des playlists (PlaylistStat).
+
+- record_samples : un échantillon par playlist vue (scan, découverte,
+  rafraîchissement) ; les seaux jour / semaine / mois sont mis à jour en un
+  seul INSERT ... ON CONFLICT DO UPDATE, le cumul est donc toujours à jour.
+- compact_stats : les seaux journaliers puis hebdomadaires anciens sont
+  supprimés (les seaux plus larges gardent l'information).
+- playlist_series / total_series : lecture d'une période sur l'index
+  (period, bucket), sans parcourir les échantillons bruts ; le cumul reporte
+  la dernière valeur connue de chaque playlist et il est agrégé en SQL.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..models import Playlist, PlaylistStat
+
+DAILY_RETENTION = timedelta(days=120)
+WEEKLY_RETENTION = timedelta(days=3 * 365)
+PERIODS = ("day", "week", "month")
+
+
+def bucket_start(day, period):
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+def record_samples(samples, when=None):
+    """
+    samples : itérable de (playlist_id, abonnés, nombre de titres) ; None = inconnu.
+    À appeler depuis le writer unique (write_queue) ou une transaction existante.
+    """
+    day = timezone.localdate(when or timezone.now())
+    rows = {}
+    for playlist_id, followers, tracks in samples:
+        if followers is None and tracks is None:
+            continue
+        for period in PERIODS:
+            key = (playlist_id, period, bucket_start(day, period))
+            rows[key] = PlaylistStat(
+                playlist_id=playlist_id, period=period, bucket=key[2], followers=followers, tracks=tracks
+            )
+    PlaylistStat.objects.bulk_create(
+        rows.values(),
+        update_conflicts=True,
+        unique_fields=["playlist", "period", "bucket"],
+        update_fields=["followers", "tracks"],
+    )
+    return len(rows) // len(PERIODS)
+
+
+def compact_stats(today=None):
+    """Supprime les seaux jour / semaine au-delà de leur durée de rétention."""
+    today = today or timezone.localdate()
+    deleted, _ = PlaylistStat.objects.filter(period="day", bucket__lt=today - DAILY_RETENTION).delete()
+    weekly, _ = PlaylistStat.objects.filter(period="week", bucket__lt=today - WEEKLY_RETENTION).delete()
+    return deleted + weekly
+
+
+def playlist_series(playlist_id, period="day", since=None):
+    """[{"bucket", "followers", "tracks"}] d'une playlist, par ordre chronologique."""
+    qs = PlaylistStat.objects.filter(playlist_id=playlist_id, period=period)
+    if since:
+        qs = qs.filter(bucket__gte=bucket_start(since, period))
+    return list(qs.order_by("bucket").values("bucket", "followers", "tracks"))
+
+
+def _previous(period, field, before, playlist="playlist_id"):
+    """Dernière valeur non nulle de field pour la playlist (OuterRef), sur un seau antérieur à before."""
+    return Subquery(
+        PlaylistStat.objects.filter(playlist_id=OuterRef(playlist), period=period, bucket__lt=before)
+        .exclude(**{f"{field}__isnull": True})
+        .order_by("-bucket").values(field)[:1]
+    )
+
+
+def total_series(period="week", since=None, playlist_ids=None):
+    """
+    Cumul par seau sur un ensemble de playlists (toutes par défaut) :
+    [{"bucket", "followers", "tracks", "playlists"}]. Chaque playlist compte
+    avec sa dernière valeur connue jusqu'au seau (reportée sur les seaux où
+    elle n'a pas été échantillonnée) : la courbe suit l'audience, pas la
+    couverture des scans. "playlists" est le nombre de playlists comptées.
+
+    Tout est agrégé en SQL : une requête donne le cumul avant since (dernière
+    valeur de chaque playlist), une autre la variation par seau de la période
+    (écart avec la valeur précédente de la playlist) ; seul le cumul des
+    variations, un point par seau, est fait en Python.
+    """
+    qs = PlaylistStat.objects.filter(period=period)
+    playlists = Playlist.objects.all()
+    if playlist_ids is not None:
+        qs = qs.filter(playlist_id__in=playlist_ids)
+        playlists = playlists.filter(pk__in=playlist_ids)
+
+    followers = tracks = counted = 0
+    if since:
+        start = bucket_start(since, period)
+        qs = qs.filter(bucket__gte=start)
+        seed = playlists.annotate(
+            f=_previous(period, "followers", start, playlist="pk"),
+            t=_previous(period, "tracks", start, playlist="pk"),
+        ).aggregate(
+            followers=Coalesce(Sum("f"), 0), tracks=Coalesce(Sum("t"), 0),
+            playlists=Count("pk", filter=Q(f__isnull=False) | Q(t__isnull=False)),
+        )
+        followers, tracks, counted = seed["followers"], seed["tracks"], seed["playlists"]
+
+    # Variation apportée par chaque échantillon : nouvelle valeur - valeur reportée jusque-là
+    deltas = (
+        qs.annotate(
+            prev_f=_previous(period, "followers", OuterRef("bucket")),
+            prev_t=_previous(period, "tracks", OuterRef("bucket")),
+            first=~Exists(PlaylistStat.objects.filter(
+                playlist_id=OuterRef("playlist_id"), period=period, bucket__lt=OuterRef("bucket"),
+            )),
+        )
+        .values("bucket")
+        .annotate(
+            followers=Coalesce(Sum(F("followers") - Coalesce("prev_f", 0)), 0),
+            tracks=Coalesce(Sum(F("tracks") - Coalesce("prev_t", 0)), 0),
+            playlists=Count("pk", filter=Q(first=True)),
+        )
+        .order_by("bucket")
+    )
+    series = []
+    for row in deltas:
+        followers += row["followers"]
+        tracks += row["tracks"]
+        counted += row["playlists"]
+        series.append({"bucket": row["bucket"], "followers": followers, "tracks": tracks, "playlists": counted})
+    return series
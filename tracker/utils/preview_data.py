@@ -1,63 +1,43 @@
 import pandas as pd
-from openpyxl import load_workbook
-from datetime import datetime, date
+from .excel_stream import iter_sheet_rows, clean_text, clean_count, clean_dates
 
-def build_apparitions_preview(file):
-    wb = load_workbook(file)
-    ws = wb.active
-    data = list(ws.values)
-    df = pd.DataFrame(data[1:], columns=data[0])
+APPARITIONS_COLUMNS = ["Titre", "Playlist", "Curateur", "Contact", "Abonnés", "Date d'ajout", "Etat", "Description", "Mise à jour"]
+PLAYLISTS_COLUMNS = ["Nom", "URL", "Curateur", "Abonnés", "Description"]
 
-    preview_data = []
-    for row_index, row in df.iterrows():
-        excel_row = row_index + 2
-        playlist_cell = ws.cell(row=excel_row, column=list(df.columns).index("Playlist") + 1)
-        curateur_cell = ws.cell(row=excel_row, column=list(df.columns).index("Curateur") + 1)
-        playlist_url = playlist_cell.hyperlink.target if playlist_cell.hyperlink else ""
-        curateur_url = curateur_cell.hyperlink.target if curateur_cell.hyperlink else ""
-        preview_data.append({
-            "Titre": row.get("Titre") or "",
-            "Playlist": row.get("Playlist") or "",
-            "PlaylistURL": playlist_url,
-            "Curateur": row.get("Curateur") or "",
-            "CurateurURL": curateur_url,
-            "Contact": row.get("Contact") or "",
-            "Abonnés": (str(row.get("Abonnés")).replace("\u202f","").replace(" ","").strip() if row.get("Abonnés") not in [None,""] else ""),
-            "Date d'ajout": clean_preview(row.get("Date d'ajout")),
-            "Etat": row.get("Etat") or "",
-            "Description": row.get("Description") or "",
-            "Mise à jour": clean_preview(row.get("Mise à jour")),
-        })
-    return preview_data
 
-def build_playlists_preview(file):
-    wb = load_workbook(file)
-    ws = wb.active
-    data = list(ws.values)
-    df = pd.DataFrame(data[1:], columns=data[0])
+def iter_apparitions_preview(file):
+    """
+    Lignes de preview d'un fichier d'apparitions, émises au fil de la lecture.
+    """
+    for df in iter_sheet_rows(file, APPARITIONS_COLUMNS, link_columns=("Playlist", "Curateur")):
+        out = pd.DataFrame({
+            "Titre": clean_text(df["Titre"]),
+            "Playlist": clean_text(df["Playlist"]),
+            "PlaylistURL": df["PlaylistURL"] if "PlaylistURL" in df else "",
+            "Curateur": clean_text(df["Curateur"]),
+            "CurateurURL": df["CurateurURL"] if "CurateurURL" in df else "",
+            "Contact": clean_text(df["Contact"]),
+            "Abonnés": clean_count(df["Abonnés"]),
+            "Date d'ajout": clean_dates(df["Date d'ajout"]),
+            "Etat": clean_text(df["Etat"]),
+            "Description": clean_text(df["Description"]),
+            "Mise à jour": clean_dates(df["Mise à jour"]),
+        })
+        yield from out.to_dict("records")
 
-    preview_data = []
-    for row_index, row in df.iterrows():
-        excel_row = row_index + 2
-        url_cell = ws.cell(row=excel_row, column=list(df.columns).index("URL") + 1)
-        url = url_cell.hyperlink.target if url_cell.hyperlink else row.get("URL") or ""
-        preview_data.append({
-            "Nom": row.get("Nom") or "",
+def iter_playlists_preview(file):
+    """
+    Lignes de preview d'un fichier de playlists, émises au fil de la lecture.
+    """
+    for df in iter_sheet_rows(file, PLAYLISTS_COLUMNS, link_columns=("URL",)):
+        url = clean_text(df["URL"])
+        if "URLURL" in df:
+            url = df["URLURL"].mask(df["URLURL"] == "", url)
+        out = pd.DataFrame({
+            "Nom": clean_text(df["Nom"]),
             "URL": url,
-            "Curateur": row.get("Curateur") or "",
-            "Abonnés": row.get("Abonnés") or "",
-            "Description": row.get("Description") or ""
+            "Curateur": clean_text(df["Curateur"]),
+            "Abonnés": clean_count(df["Abonnés"]),
+            "Description": clean_text(df["Description"]),
         })
-    return preview_data
-
-def clean_preview(value):
-    """Préparer les valeurs pour affichage dans la preview"""
-    if pd.isna(value) or value == "":
-        return ""
-    if isinstance(value, pd.Timestamp):
-        return value.date().isoformat()
-    if isinstance(value, datetime):
-        return value.date().isoformat()
-    if isinstance(value, date):
-        return value.isoformat()
-    return str(value)
\ No newline at end of file
+        yield from out.to_dict("records")
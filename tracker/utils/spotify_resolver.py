@@ -0,0 +1,191 @@
+"""
+Résolution des identifiants Spotify temporaires ("temp_<nom>") créés par l'import.
+
+1. Les noms en attente sont dédupliqués (une recherche par nom, pas par ligne).
+2. Un identifiant présent dans l'URL importée est utilisé sans appel API ;
+   sinon une recherche Spotify est faite (résultat mis en cache, appels limités
+   par spotify_rate_limiter).
+3. Les titres candidats sont validés par l'endpoint multi-ID `tracks`, 50 par appel.
+4. Les lignes sont fusionnées en bulk : si l'identifiant réel existe déjà,
+   les apparitions sont rattachées à l'enregistrement canonique et la ligne
+   temporaire est supprimée ; sinon elle reçoit son vrai spotify_id.
+"""
+import hashlib
+import re
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from playlistwatcher.db import write_queue
+from tracker.models import Appearance, Playlist, Track
+from tracker.spotify import safe_spotify_call
+
+TEMP_PREFIX = "temp_"
+TRACKS_BATCH_SIZE = 50
+SEARCH_CACHE_TIMEOUT = 7 * 24 * 3600
+SPOTIFY_URL_RE = re.compile(r"open\.spotify\.com/(?:intl-[a-z]+/)?(track|playlist)/([A-Za-z0-9]{22})")
+
+
+def spotify_id_from_url(url, kind):
+    match = SPOTIFY_URL_RE.search(url or "")
+    return match.group(2) if match and match.group(1) == kind else None
+
+
+def _norm(value):
+    return (value or "").strip().casefold()
+
+
+def cached_search(sp, query, type_, limit=10):
+    """
+    Recherche Spotify mise en cache (résultats vides compris).
+    Retourne une projection minimale des résultats.
+    """
+    key = "spotify_search:" + hashlib.sha1(f"{type_}:{limit}:{query}".encode()).hexdigest()
+    items = cache.get(key)
+    if items is None:
+        results = safe_spotify_call(sp.search, q=query, type=type_, limit=limit)
+        items = []
+        for it in (results.get(f"{type_}s") or {}).get("items", []):
+            if not it or not it.get("id"):
+                continue
+            items.append({
+                "id": it["id"],
+                "name": it.get("name") or "",
+                "artists": [a.get("name") or "" for a in it.get("artists") or []],
+                "owner": (it.get("owner") or {}).get("display_name") or "",
+            })
+        cache.set(key, items, SEARCH_CACHE_TIMEOUT)
+    return items
+
+
+def _pick_track(items, name, artist):
+    """Titre ET artiste identiques (normalisés), sinon None : une fusion erronée est irréversible."""
+    for it in items:
+        if _norm(it["name"]) == _norm(name) and _norm(artist) in map(_norm, it["artists"]):
+            return it["id"]
+    return None
+
+
+def _pick_playlist(items, name, owner):
+    exact = [it for it in items if _norm(it["name"]) == _norm(name)]
+    for it in exact:
+        if owner and _norm(it["owner"]) == _norm(owner):
+            return it["id"]
+    return exact[0]["id"] if exact else None
+
+
+def validate_track_ids(sp, ids):
+    """
+    Valide des ids de titres via l'endpoint `tracks` (50 par appel).
+    Retourne {id demandé: (id canonique, url)} ; les ids inconnus sont absents.
+    """
+    ids = list(dict.fromkeys(ids))
+    valid = {}
+    for start in range(0, len(ids), TRACKS_BATCH_SIZE):
+        batch = ids[start:start + TRACKS_BATCH_SIZE]
+        results = safe_spotify_call(sp.tracks, batch) or {}
+        for requested, track in zip(batch, results.get("tracks") or []):
+            if track and track.get("id"):
+                valid[requested] = (track["id"], (track.get("external_urls") or {}).get("spotify", ""))
+    return valid
+
+
+def _merge_into_canonical(model, fk, mapping):
+    """
+    mapping : {pk temporaire: (spotify_id réel, url)}.
+    Exécuté par le writer unique, en une transaction.
+    """
+    canonical = {o.spotify_id: o for o in model.objects.filter(spotify_id__in={sid for sid, _ in mapping.values()})}
+    to_update, repoint = [], {}
+    url_field = "spotify_url" if model is Track else "url"
+    fields = ["spotify_id", url_field, "updated_at"]  # bulk_update ne déclenche pas auto_now
+    now = timezone.now()
+    for obj in model.objects.filter(pk__in=mapping):
+        sid, url = mapping[obj.pk]
+        if sid in canonical:
+            repoint[obj.pk] = canonical[sid].pk
+            continue
+        obj.spotify_id = sid
+        if url and not getattr(obj, url_field):
+            setattr(obj, url_field, url)
+        obj.updated_at = now
+        canonical[sid] = obj
+        to_update.append(obj)
+    model.objects.bulk_update(to_update, fields)
+
+    if repoint:
+        other = "playlist_id" if fk == "track" else "track_id"
+        kept = {
+            (getattr(a, f"{fk}_id"), getattr(a, other)): a
+            for a in Appearance.objects.filter(**{f"{fk}_id__in": set(repoint.values())})
+        }
+        moved, completed, duplicates = [], {}, []
+        for a in Appearance.objects.filter(**{f"{fk}_id__in": list(repoint)}):
+            key = (repoint[getattr(a, f"{fk}_id")], getattr(a, other))
+            target = kept.get(key)
+            if target is None:
+                setattr(a, f"{fk}_id", key[0])
+                kept[key] = a
+                moved.append(a)
+                continue
+            # Doublon : on complète l'apparition canonique puis on supprime celle-ci
+            for field in ("contact", "added_on", "state"):
+                if not getattr(target, field) and getattr(a, field):
+                    setattr(target, field, getattr(a, field))
+                    completed[target.pk] = target
+            duplicates.append(a.pk)
+        completed = [a for a in completed.values() if a.pk]
+        for a in moved + completed:
+            a.updated_at = now  # bulk_update ne déclenche pas auto_now
+        Appearance.objects.filter(pk__in=duplicates).delete()
+        Appearance.objects.bulk_update(moved, [f"{fk}_id", "updated_at"])
+        Appearance.objects.bulk_update(completed, ["contact", "added_on", "state", "updated_at"])
+        model.objects.filter(pk__in=repoint).delete()
+    return len(to_update), len(repoint)
+
+
+def resolve_tracks(sp, limit=None):
+    groups = defaultdict(list)
+    for track in Track.objects.filter(spotify_id__startswith=TEMP_PREFIX).select_related("artist")[:limit]:
+        groups[(_norm(track.name), _norm(track.artist.name))].append(track)
+
+    candidates = {}
+    for tracks in groups.values():
+        first = tracks[0]
+        sid = next(filter(None, (spotify_id_from_url(t.spotify_url, "track") for t in tracks)), None)
+        if not sid:
+            items = cached_search(sp, f'track:"{first.name}" artist:"{first.artist.name}"', "track")
+            sid = _pick_track(items, first.name, first.artist.name)
+        if sid:
+            candidates[tuple(t.pk for t in tracks)] = sid
+
+    valid = validate_track_ids(sp, candidates.values())
+    mapping = {pk: valid[sid] for pks, sid in candidates.items() if sid in valid for pk in pks}
+    updated, merged = write_queue.run(_merge_into_canonical, Track, "track", mapping) if mapping else (0, 0)
+    return {"pending": sum(map(len, groups.values())), "names": len(groups), "updated": updated, "merged": merged}
+
+
+def resolve_playlists(sp, limit=None):
+    groups = defaultdict(list)
+    for playlist in Playlist.objects.filter(spotify_id__startswith=TEMP_PREFIX)[:limit]:
+        groups[_norm(playlist.name)].append(playlist)
+
+    mapping = {}
+    for playlists in groups.values():
+        first = playlists[0]
+        sid = next(filter(None, (spotify_id_from_url(p.url, "playlist") for p in playlists)), None)
+        if not sid:
+            items = cached_search(sp, first.name, "playlist")
+            sid = _pick_playlist(items, first.name, first.owner_name)
+        if sid:
+            for p in playlists:
+                mapping[p.pk] = (sid, f"https://open.spotify.com/playlist/{sid}")
+
+    updated, merged = write_queue.run(_merge_into_canonical, Playlist, "playlist", mapping) if mapping else (0, 0)
+    return {"pending": sum(map(len, groups.values())), "names": len(groups), "updated": updated, "merged": merged}
+
+
+def resolve_pending_ids(sp, limit=None):
+    """Étape de pipeline : résout titres puis playlists temporaires."""
+    return {"tracks": resolve_tracks(sp, limit), "playlists": resolve_playlists(sp, limit)}
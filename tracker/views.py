@@ -1,27 +1,56 @@
+import os
 import pandas as pd
 import threading
 import traceback
 import json
+import uuid
+from datetime import timedelta
 
 from django.core.management import call_command
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
-from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, FileResponse, Http404
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 from django.contrib import messages
+from django.core.paginator import Paginator
+from django.db.models import F
 from spotipy.oauth2 import SpotifyOAuth
 
-from .models import Appearance, Playlist, Artist, Track, TaskStatus, SpotifyCredentials, SpotifyToken
+from .models import Appearance, Playlist, Artist, Track, TaskStatus, SpotifyCredentials, SpotifyToken, ImportBatch
 from .forms import TrackForm, ExcelUploadForm, SpotifyCredentialsForm
-from .utils.preview_data import build_apparitions_preview, build_playlists_preview
-from .utils.import_data import import_preview_apparitions, import_preview_playlists
-from .utils.export_data import export_apparitions_excel, export_apparitions_pdf
+from .utils.preview_data import iter_apparitions_preview, iter_playlists_preview
+from .utils.import_staging import ROW_STATUSES, apply_staged_import, file_hash, find_applied_batch, stage_import
+from .utils.export_data import (
+    APPEARANCE_STREAM_COLUMNS, APPEARANCE_STREAM_FILTERS, PLAYLIST_STREAM_COLUMNS, PLAYLIST_STREAM_FILTERS,
+)
+from .utils.artist_catalogue import import_artist_catalogue
+from .utils.playlist_stats import PERIODS as PLAYLIST_STAT_PERIODS, playlist_series, total_series
+from .utils.export_jobs import EXPORT_KINDS, artifact_path, clean_filters, export_job_state, start_export_job
+from playlistwatcher.streaming import parse_since, stream_export
 from tracker.spotify import get_spotify_credentials, get_client
 
 
+FRESH_PLACEMENT_DAYS = 7
+HIGH_PLACEMENT_RANK = 10
+DASHBOARD_SORTS = {
+    "": (F("updated_on").desc(nulls_last=True),),
+    "recent": (F("added_on").desc(nulls_last=True),),
+    "position": (F("position").asc(nulls_last=True), F("added_on").desc(nulls_last=True)),
+}
+
+
 def dashboard(request):
-    rows = Appearance.objects.select_related("track", "playlist").order_by("-updated_on")
+    sort = request.GET.get("sort", "")
+    rows = Appearance.objects.select_related("track", "playlist").order_by(
+        *DASHBOARD_SORTS.get(sort, DASHBOARD_SORTS[""])
+    )
+
+    # Placements récents (ajoutés depuis FRESH_PLACEMENT_DAYS) et bien classés (top HIGH_PLACEMENT_RANK)
+    fresh_placements = Appearance.objects.filter(
+        added_on__gte=timezone.now() - timedelta(days=FRESH_PLACEMENT_DAYS)
+    ).count()
+    high_placements = Appearance.objects.filter(position__lte=HIGH_PLACEMENT_RANK).exclude(state="lost").count()
 
     # Actives playlists
     active_playlists = Playlist.objects.count()
@@ -51,6 +80,11 @@ def dashboard(request):
 
     return render(request, "tracker/dashboard.html", {
         "rows": rows,
+        "sort": sort,
+        "fresh_placements": fresh_placements,
+        "fresh_placement_days": FRESH_PLACEMENT_DAYS,
+        "high_placements": high_placements,
+        "high_placement_rank": HIGH_PLACEMENT_RANK,
         "active_playlists": active_playlists,
         "new_playlists_count": new_playlists_count,
         "artists": artists,
@@ -115,6 +149,33 @@ def artist_delete(request, pk):
     messages.success(request, f"Artiste '{name}' supprimé !")
     return redirect("artist_list")
 
+def artist_import_catalogue(request):
+    """Importe le catalogue Spotify d'un artiste (ID saisi ou artiste existant)."""
+    if request.method != "POST":
+        return redirect("artist_track_manage")
+    spotify_id = (request.POST.get("spotify_id") or "").strip()
+    if not spotify_id:
+        messages.error(request, "L'ID Spotify de l'artiste est obligatoire.")
+        return redirect("artist_track_manage")
+
+    sp = get_client()
+    if not sp:
+        messages.error(request, "⚠️ Aucun client Spotify valide trouvé. Veuillez connecter votre compte.")
+        return redirect("artist_track_manage")
+
+    try:
+        stats = import_artist_catalogue(sp, spotify_id)
+    except Exception as e:
+        messages.error(request, f"Erreur lors de l'import du catalogue : {e}")
+        return redirect("artist_track_manage")
+
+    messages.success(
+        request,
+        f"Catalogue de '{stats['artist'].name}' importé : {stats['created']} titres ajoutés, "
+        f"{stats['skipped']} déjà présents ({stats['albums']} albums)."
+    )
+    return redirect("artist_track_manage")
+
 
 # ----- Track management -----
 def track_list(request):
@@ -248,6 +309,28 @@ def stop_scan_playlists(request):
     return redirect("dashboard")
 
 
+def playlist_stats(request):
+    """
+    Série abonnés / titres pour les graphiques du dashboard.
+    GET : period (day, week, month), since (date ISO), playlist (id, sinon cumul de toutes).
+    """
+    period = request.GET.get("period", "week")
+    if period not in PLAYLIST_STAT_PERIODS:
+        return HttpResponseBadRequest(f"Période inconnue : {period}")
+    since = parse_since(request.GET.get("since"))
+    if request.GET.get("since") and since is None:
+        return HttpResponseBadRequest("Paramètre 'since' invalide (format ISO attendu).")
+    since = since.date() if since else None
+
+    playlist_id = request.GET.get("playlist")
+    if playlist_id:
+        playlist = get_object_or_404(Playlist, pk=playlist_id)
+        series = playlist_series(playlist.pk, period, since)
+    else:
+        series = total_series(period, since)
+    return JsonResponse({"period": period, "playlist": playlist_id, "series": series})
+
+
 def scan_status(request):
     task_status = TaskStatus.objects.filter(name="scan_playlists").first()
     data = {"status": "idle", "extra_info": "", "current": 0, "total": 0}
@@ -331,74 +414,206 @@ def import_export(request):
     Page unique pour Import/Export apparitions + playlists
     """
 
-    # --- Import apparitions ---
-    if request.method == "POST" and "import_apparitions" in request.POST:
+    # --- Import apparitions / playlists : lignes stockées en staging ---
+    if request.method == "POST" and ("import_apparitions" in request.POST or "import_playlists" in request.POST):
         form = ExcelUploadForm(request.POST, request.FILES)
         if form.is_valid():
             file = form.cleaned_data["file"]
-            preview_data = build_apparitions_preview(file)
-            request.session["import_preview_type"] = "apparitions"
-            request.session["import_preview"] = preview_data
-            return render(request, "tracker/import_preview.html", {
-                "preview_data": preview_data,
-                "total": len(preview_data),
-                "type": "apparitions"
-            })
-
-    # --- Import playlists ---
-    elif request.method == "POST" and "import_playlists" in request.POST:
-        form = ExcelUploadForm(request.POST, request.FILES)
-        if form.is_valid():
-            file = form.cleaned_data["file"]
-            preview_data = build_playlists_preview(file)
-            request.session["import_preview_type"] = "playlists"
-            request.session["import_preview"] = preview_data
-            return render(request, "tracker/import_preview.html", {
-                "preview_data": preview_data,
-                "total": len(preview_data),
-                "type": "playlists"
-            })
+            kind = "apparitions" if "import_apparitions" in request.POST else "playlists"
+            content_hash = file_hash(file)
+
+            # Même fichier déjà importé : signalé, mais reclassé par rapport aux données actuelles
+            previous = find_applied_batch(kind, content_hash)
+            if previous:
+                messages.info(request, f"Ce fichier a déjà été importé le {previous.applied_on:%d/%m/%Y %H:%M}.")
+            rows = iter_apparitions_preview(file) if kind == "apparitions" else iter_playlists_preview(file)
+            batch = stage_import(kind, rows, file.name, content_hash)
+            request.session["import_token"] = str(batch.token)
+            return redirect("import_preview", token=batch.token)
 
     else:
         form = ExcelUploadForm()
 
-    return render(request, "tracker/import_export.html", {"form": form})
+    return render(request, "tracker/import_export.html", {
+        "form": form,
+        "artists": Artist.objects.order_by("name"),
+        "tracks": Track.objects.order_by("name"),
+    })
+
+
+def import_preview(request, token):
+    """
+    Preview paginée d'un import en staging, filtrable par statut de ligne.
+    """
+    batch = get_object_or_404(ImportBatch, token=token, applied_on__isnull=True)
+    rows = batch.rows.all()
+    status = request.GET.get("status")
+    if status in ROW_STATUSES:
+        rows = rows.filter(status=status)
+    page_obj = Paginator(rows, 100).get_page(request.GET.get("page", 1))
+
+    return render(request, "tracker/import_preview.html", {
+        "batch": batch,
+        "page_obj": page_obj,
+        "columns": list(page_obj.object_list[0].data) if page_obj.object_list else [],
+        "total": batch.total,
+        "summary": batch.summary,
+        "statuses": ROW_STATUSES,
+        "selected_status": status,
+        "type": batch.kind,
+    })
+
+
+def run_import_async(batch_id, mode):
+    status = TaskStatus.objects.get(name="import_data")
+
+    def progress(current, total):
+        status.extra_json.update({"current": current, "total": total})
+        status.save(update_fields=["extra_json"])
+
+    try:
+        batch = ImportBatch.objects.get(pk=batch_id)
+        imported, updated = apply_staged_import(batch, mode, progress)
+        status.status = "done"
+        status.extra_info = f"{imported} lignes importées, {updated} mises à jour"
+
+    except Exception as e:
+        status.status = "error"
+        status.extra_info = str(e)
+        print(f"Erreur globale de l'import: {e}")
+        traceback.print_exc()
+
+    finally:
+        status.save()
 
 
 def confirm_import(request):
     """
-    Confirme l'import selon la preview stockée en session
+    Lance en arrière-plan l'import depuis le staging
     """
-    data = request.session.get("import_preview")
-    type_ = request.session.get("import_preview_type")
-    if not data or not type_:
+    token = request.POST.get("token") or request.session.get("import_token")
+    if token:
+        try:
+            token = uuid.UUID(str(token))
+        except ValueError:
+            return HttpResponseBadRequest("Jeton d'import invalide.")
+    batch = ImportBatch.objects.filter(token=token, applied_on__isnull=True).first() if token else None
+    if not batch:
         messages.error(request, "Aucune donnée à importer.")
         return redirect("import_export")
 
+    status, _ = TaskStatus.objects.get_or_create(name="import_data")
+    if status.status == "running":
+        messages.warning(request, "Un import est déjà en cours, réessayez à la fin de celui-ci.")
+        return redirect("import_preview", token=batch.token)
+
+    status.status = "running"
+    status.stop_requested = False
+    status.extra_info = batch.filename
+    status.extra_json = {"current": 0, "total": batch.total}
+    status.save()
+
     mode = request.POST.get("mode", "complete")
-    if type_ == "apparitions":
-        imported, updated = import_preview_apparitions(data, mode)
-    else:
-        imported, updated = import_preview_playlists(data, mode)
+    threading.Thread(target=run_import_async, args=(batch.pk, mode), daemon=True).start()
 
     # Nettoyer la session
-    del request.session["import_preview"]
-    del request.session["import_preview_type"]
+    request.session.pop("import_token", None)
+
+    messages.info(request, "Import lancé en arrière-plan ⏳")
+    return redirect("import_export")
 
-    messages.success(request, f"{imported} lignes importées, {updated} mises à jour.")
-    return redirect("dashboard")
+
+def import_status(request):
+    task_status = TaskStatus.objects.filter(name="import_data").first()
+    data = {"status": "idle", "extra_info": "", "current": 0, "total": 0}
+
+    if task_status:
+        data["status"] = task_status.status
+        data["extra_info"] = task_status.extra_info or ""
+        if task_status.extra_json and isinstance(task_status.extra_json, dict):
+            data["current"] = task_status.extra_json.get("current", 0)
+            data["total"] = task_status.extra_json.get("total", 0)
+
+    return JsonResponse(data)
+
+
+def _serve_cached_export(request, kind):
+    """
+    Sert l'artefact en cache s'il est à jour ; sinon lance sa génération
+    en arrière-plan et renvoie vers la page d'export.
+    """
+    try:
+        filters = clean_filters(request.GET.get("artist"), request.GET.get("track"))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    key = start_export_job(kind, filters)
+    if export_job_state(key)["ready"]:
+        return export_job_download(request, key)
+    messages.info(request, "Export en cours de préparation en arrière-plan ⏳ Réessayez dans quelques instants.")
+    return redirect("import_export")
 
 
 def export_excel(request):
-    wb = export_apparitions_excel()
-    response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    response["Content-Disposition"] = 'attachment; filename="export.xlsx"'
-    wb.save(response)
-    return response
+    return _serve_cached_export(request, "xlsx")
 
 
 def export_pdf(request):
-    return export_apparitions_pdf()
+    return _serve_cached_export(request, "pdf")
+
+
+def export_job_start(request, kind):
+    """
+    Démarre (ou réutilise) un export en arrière-plan et renvoie sa clé + son état.
+    """
+    if kind not in EXPORT_KINDS:
+        return HttpResponseBadRequest(f"Type d'export inconnu : {kind}")
+    try:
+        filters = clean_filters(request.GET.get("artist"), request.GET.get("track"))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    key = start_export_job(kind, filters)
+    data = export_job_state(key)
+    data["key"] = key
+    data["download_url"] = reverse("export_job_download", args=[key])
+    return JsonResponse(data)
+
+
+def export_job_status(request, key):
+    return JsonResponse(export_job_state(key))
+
+
+def export_job_download(request, key):
+    kind = key.split("_", 1)[0]
+    path = artifact_path(key)
+    if kind not in EXPORT_KINDS or not os.path.exists(path):
+        raise Http404("Export introuvable ou expiré.")
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=f"export.{kind}", content_type=EXPORT_KINDS[kind])
+
+
+def export_appearances_stream(request, fmt):
+    """
+    Export CSV / NDJSON des apparitions (jointes titre + playlist), en streaming.
+    """
+    return stream_export(
+        request, Appearance.objects.all(), fmt,
+        available=APPEARANCE_STREAM_COLUMNS,
+        filters=APPEARANCE_STREAM_FILTERS,
+        cursor_field="updated_at",
+        filename="apparitions",
+    )
+
+
+def export_playlists_stream(request, fmt):
+    """
+    Export CSV / NDJSON des playlists, en streaming.
+    """
+    return stream_export(
+        request, Playlist.objects.all(), fmt,
+        available=PLAYLIST_STREAM_COLUMNS,
+        filters=PLAYLIST_STREAM_FILTERS,
+        cursor_field="updated_at",
+        filename="playlists",
+    )
 
 
 # ----- Login and credentials management -----